@@ -7,6 +7,12 @@ SPDX-License-Identifier: Apache-2.0
 import os
 import csv
 import sys
+import re
+import json
+import codecs
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from time import time, sleep
 from charset_normalizer import from_path
 from apptio_lib import cloudability as cldy
@@ -14,7 +20,8 @@ from apptio_lib import apptio as apptio
 
 
 # Purpose: Update Account Group values for accounts based on CSV files
-# Takes in all CSV files in the same directory.
+# Takes in all CSV files in the same directory. Files are merged in name order; when two rows set
+# different values for the same account and AG the later row wins and the conflict is reported.
 # Looks for "vendor_account_id" or "vendor_account_name" as the first column and AG names the other columns
 # Finds the matching account group Ids from the API and matches those IDs to the AG names in the column headers.
 # updates all AG values found in the column headers to the associated IDs.
@@ -25,8 +32,37 @@ from apptio_lib import apptio as apptio
 #       Put cldy key on the command line
 # Known issues:
 #   * vendor account ID must be in format ####-####-#### for AWS account IDs. There is untested code to do this included
-#   * 429 errors for too many API requests. May need to run repeatedly if there are too many updates being made.
-#   * configurable delay has been added 0.5 - 1 sec seems to work best when making more than 1K updates
+#   * 429 responses are retried automatically (honouring Retry-After when the API sends it) and the shared
+#     rate limiter slows every worker down, then speeds back up while requests keep succeeding.
+#   * completed entries are recorded in a journal file per API key; an interrupted run can simply be started
+#     again and will skip everything already applied. The journal is removed after a run with no failures
+#     and ignored once it is older than JOURNAL_TTL.
+
+
+# Concurrent update settings
+UPDATE_WORKERS = 8
+INITIAL_RATE = 2.0  # requests per second across all workers (the old fixed 0.5 sec delay)
+MIN_RATE = 0.5
+MAX_RATE = 20.0
+RATE_INCREASE = 0.1  # requests per second added after each successful call
+MAX_RETRIES = 5
+JOURNAL_DIR = '.'
+JOURNAL_TTL = 86400  # seconds
+
+# Vendor account cache settings
+VENDOR_WORKERS = 4
+ACCOUNT_CACHE_DIR = '.cldy_cache'
+ACCOUNT_CACHE_TTL = 3600  # seconds
+AZURE_ID_PATTERN = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
+GCP_BILLING_ID_PATTERN = re.compile(r'^[0-9a-fA-F]{6}-[0-9a-fA-F]{6}-[0-9a-fA-F]{6}$')
+
+# Encoding detection settings
+ENCODING_WORKERS = 4
+CSV_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
 
 
 def main():
@@ -46,6 +82,7 @@ def main():
         if file[0] == '.':
             continue  # skipping .trashes and such, just in case.
         files.append('./' + file)
+    files.sort()
     if not files:
         print('No csv files found in current directory. Quitting')
         return False
@@ -58,37 +95,50 @@ def main():
     print(f'Found {len(updates)} accounts in csv files.')
 
     account_groups = get_ag_list(api_key)  #getting AG names and IDs
-    ag_entries = get_ag_entries(api_key, account_groups) #get list of current AG entries
 
     ag_lookup = {}
     for ag in account_groups:
         ag_lookup[ag['name']] = ag['id']
-    account_mapping = get_acct_mapping(api_key) #get list of accounts in Cldy
-    # account_mapping acts as a dual lookup. ID to name and name to ID
+    account_index = get_acct_mapping(api_key) #get list of accounts in Cldy
+    # account_index resolves either an account ID or an account name to the ID Cldy uses
 
-    save_ag_entries_backup(ag_entries, ag_lookup) #save current AG entries to a backup file
+    # resolve each csv account once, then only fetch entries for the accounts and AGs the csv touches
+    resolved_accounts = {csv_acc_id: account_index.resolve(csv_acc_id) for csv_acc_id in updates}
+    csv_account_ids = set(resolved_accounts.values()) - {None}
+    csv_ag_names = {ag_name for entries in updates.values() for ag_name in entries if ag_name in ag_lookup}
+    ag_entries = get_ag_entries(api_key, account_groups, csv_account_ids, csv_ag_names) #get list of current AG entries
+
+    # only the fetched AGs go in the backup - a blank cell for any other AG would delete its entry on restore
+    backup_ag_lookup = {ag_name: ag_id for ag_name, ag_id in ag_lookup.items() if ag_name in csv_ag_names}
+    save_ag_entries_backup(ag_entries, backup_ag_lookup) #save current AG entries for the affected accounts to a backup file
 
     update_data = []
     entry_count = 0
     skip_count = 0
     account_log = {'found': set(), 'not_found': set()}
-    deleted_count = 0
-    for acc_id, updated_entries in updates.items():
-        if acc_id not in account_mapping:
-            account_log['not_found'].add(acc_id)
-            # print(f'Account {acc_id} not found in account mapping. Skipping')
+    delete_count = 0
+    for csv_acc_id, updated_entries in updates.items():
+        acc_id = resolved_accounts[csv_acc_id]
+        if not acc_id:
+            account_log['not_found'].add(csv_acc_id)
+            # print(f'Account {csv_acc_id} not found in account mapping. Skipping')
             continue
-        account_log['found'].add(acc_id)
+        account_log['found'].add(csv_acc_id)
         for ag_name, value in updated_entries.items():
             if not value:
-                try:
-                    current_entry = ag_entries[acc_id][ag_name]
-                    delete_ag_entry(api_key, current_entry)
-                    print(f'Deleting entry {current_entry['value']} for {acc_id} {ag_name}')
-                    deleted_count += 1
-                except KeyError:
-                    # There wasn't a value, so there's nothing ot delete.
-                    pass
+                current_entry = ag_entries.get(acc_id, {}).get(ag_name)
+                if current_entry:
+                    # queued with the updates so deletes share the rate-limited pipeline
+                    update_data.append({
+                        'id': current_entry['id'],
+                        'value': current_entry['value'],
+                        'account_group_id': ag_lookup[ag_name],
+                        'account_identifier': acc_id,
+                        'ag_name': ag_name,
+                        'delete': True
+                    })
+                    delete_count += 1
+                # There wasn't a value, so there's nothing to delete.
                 continue
             entry_id = None
             entry_count += 1
@@ -113,11 +163,8 @@ def main():
         print('No new or updated values added.')
         return
     
-    if deleted_count > 0:
-        print(f'Deleted {deleted_count} entries')
-
     print('')
-    print(f'Updating {len(update_data)}')
+    print(f'Updating {len(update_data) - delete_count}, deleting {delete_count}')
     update_ag_entries(api_key, update_data)
     print('')
     print(f'Of {len(updates)} accounts in csv:')
@@ -125,31 +172,72 @@ def main():
     print(f'Not found {len(account_log["not_found"])}')
     return
 
+def fast_detect_encoding(csv_file):
+    #cheap check for a BOM or clean UTF-8 so most files skip charset_normalizer
+    with open(csv_file, 'rb') as f:
+        raw = f.read()
+    for bom, encoding in CSV_BOMS:
+        if raw.startswith(bom):
+            return encoding
+    try:
+        raw.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return None
+
+
+def detect_encoding(csv_file):
+    #full detection, run in a worker process since charset_normalizer is CPU bound
+    result = from_path(csv_file).best() #looking for encoding from library
+    if result is not None:
+        return result.encoding
+    # Fallback to something sensible, e.g. 'utf-8'
+    return 'utf-8'
+
+
+def detect_encodings(csv_files):
+    encodings = {csv_file: fast_detect_encoding(csv_file) for csv_file in csv_files}
+    unknown = [csv_file for csv_file, encoding in encodings.items() if not encoding]
+    if len(unknown) == 1:
+        encodings[unknown[0]] = detect_encoding(unknown[0])
+    elif unknown:
+        with ProcessPoolExecutor(max_workers=min(ENCODING_WORKERS, len(unknown))) as executor:
+            for csv_file, encoding in zip(unknown, executor.map(detect_encoding, unknown)):
+                encodings[csv_file] = encoding
+    return encodings
+
+
 def parse_csv(csv_files): #find csv, find encoding, pass to parse function
     account_ag_values = {}
+    sources = {}
+    conflicts = []
+    encodings = detect_encodings(csv_files)
     for csv_file in csv_files:
-        use_encoding = ''
-        result = from_path(csv_file).best() #looking for encoding from library
-        if result is not None:
-            use_encoding = result.encoding
-        else:
-            # Fallback to something sensible, e.g. 'utf-8'
-            use_encoding = 'utf-8'
-            
-        if use_encoding:
-            with open(csv_file, 'r', newline='', encoding=use_encoding) as csvfile:
-                records = csv.DictReader(csvfile)
-                if records:
-                    accounts = parse_ag_updates(records, account_ag_values)
-                return accounts
-        
-        print(f'CSV with unknown encoding. {csv_file}')
+        with open(csv_file, 'r', newline='', encoding=encodings[csv_file]) as csvfile:
+            records = csv.DictReader(csvfile)
+            if parse_ag_updates(records, account_ag_values, csv_file, sources, conflicts) is False:
+                print(f'Skipping {csv_file}')
+
+    if conflicts:
+        print(f'Warning: {len(conflicts)} conflicting values found in csv rows. Later rows win:')
+        for conflict in conflicts:
+            print(f'\t{conflict["account"]} {conflict["ag_name"]}: '
+                  f'"{conflict["old_value"]}" ({conflict["old_source"]}) -> '
+                  f'"{conflict["new_value"]}" ({conflict["new_source"]})')
+    return account_ag_values
 
-def parse_ag_updates(records, account_ag_values={}): #parsing the values in the CSV file
+def parse_ag_updates(records, account_ag_values=None, source='', sources=None, conflicts=None): #parsing the values in the CSV file
+    # sources remembers the file:line that set each (account, AG) value so conflicts can point at both rows
     acct_id_dims = ['Account Number', 'vendor_account_identifier', 'account_identifier']
+    if account_ag_values is None:
+        account_ag_values = {}
+    if sources is None:
+        sources = {}
+    if conflicts is None:
+        conflicts = []
 
     account_dim = None
-    for record in records:
+    for line, record in enumerate(records, start=2):
         acc_id = ''
         if not account_dim:
             for dim in acct_id_dims:
@@ -163,7 +251,19 @@ def parse_ag_updates(records, account_ag_values={}): #parsing the values in the
         if acc_id.isnumeric() and len(acc_id) == 12:
             acc_id = format_aws_account_id(acc_id)
         ag_entries = {k:v for k, v in record.items() if k not in acct_id_dims}
-        account_ag_values[acc_id] = ag_entries
+        current = account_ag_values.setdefault(acc_id, {})
+        for ag_name, value in ag_entries.items():
+            if ag_name in current and current[ag_name] != value:
+                conflicts.append({
+                    'account': acc_id,
+                    'ag_name': ag_name,
+                    'old_value': current[ag_name],
+                    'old_source': sources.get((acc_id, ag_name), ''),
+                    'new_value': value,
+                    'new_source': f'{source}:{line}'
+                })
+            current[ag_name] = value
+            sources[(acc_id, ag_name)] = f'{source}:{line}'
     return account_ag_values
 
 
@@ -182,26 +282,115 @@ def get_vendors(api_key):
     return vendors
 
 
-def get_acct_mapping(api_key, separate_lookups=False):
-    vendors = get_vendors(api_key)
+def normalise_account_id(account_id, vendor=None):
+    #canonical lookup key for a vendor account ID, whatever format it came in as
+    account_id = str(account_id).strip()
+    digits = account_id.replace('-', '')
+    if (vendor in (None, 'aws')) and digits.isnumeric() and len(digits) == 12:
+        return format_aws_account_id(digits)
+    if AZURE_ID_PATTERN.match(account_id):
+        return account_id.lower()  # Azure subscription GUIDs are case-insensitive
+    if GCP_BILLING_ID_PATTERN.match(account_id):
+        return account_id.upper()  # GCP billing account IDs are shown upper case
+    if vendor == 'gcp':
+        return account_id.lower()  # GCP project IDs are always lower case
+    return account_id
+
+
+class AccountIndex:
+    """
+    Two-way lookup between vendor account IDs and account names.
+
+    IDs and names are kept in separate maps so an account named like another
+    account's ID can't collide. Names that belong to several accounts are kept
+    and reported as ambiguous instead of being silently dropped.
+    """
+
+    def __init__(self):
+        self.ids = {}  # normalised id -> {'id', 'name', 'vendor'}
+        self.names = {}  # name -> list of ids as Cldy formats them
+
+    def add(self, vendor, account_id, name):
+        account_id = str(account_id)
+        if vendor == 'aws' and account_id.isnumeric() and len(account_id) == 12:
+            account_id = format_aws_account_id(account_id)
+        self.ids[normalise_account_id(account_id, vendor)] = {'id': account_id, 'name': name, 'vendor': vendor}
+        self.names.setdefault(name, []).append(account_id)
+
+    def name_for(self, account_id):
+        account = self.ids.get(normalise_account_id(account_id))
+        return account['name'] if account else None
+
+    def resolve(self, identifier):
+        #returns the account ID for an ID or a unique account name, else None
+        account = self.ids.get(normalise_account_id(identifier))
+        if account:
+            return account['id']
+        matches = self.names.get(str(identifier).strip(), [])
+        if len(matches) == 1:
+            return matches[0]
+        if len(matches) > 1:
+            print(f'Warning: Account name {identifier} matches {len(matches)} accounts. Skipping')
+        return None
+
+    def duplicate_names(self):
+        return {name: ids for name, ids in self.names.items() if len(ids) > 1}
+
+    def __contains__(self, identifier):
+        return self.resolve(identifier) is not None
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def api_key_hash(api_key):
+    #short, stable name for a key so per-tenant files never hold the key itself
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+
 
-    account_mapping = {}
-    for vendor in vendors:
-        end_point = f'/vendors/{vendor}/accounts?viewId=0'
-        results = cldy.get(api_key=api_key, end_point=end_point)['result']
-        if results:
-            for result in results:
-                account_id = result['vendorAccountId']
-                if len(str(account_id)) == 12 and account_id.isnumeric() and vendor == 'aws':
-                    account_id = format_aws_account_id(account_id)
-                if result['vendorAccountName'] in account_mapping:
-                    print(f'Warning: Duplicate account name found: {result["vendorAccountName"]}')
-                    continue
-                account_mapping[result['vendorAccountName']] = account_id
-                account_mapping[account_id] = result['vendorAccountName']
+def account_cache_path(api_key, vendor, cache_dir=ACCOUNT_CACHE_DIR):
+    #one file per key and vendor so tenants never share cached accounts
+    return os.path.join(cache_dir, f'accounts_{api_key_hash(api_key)}_{vendor}.json')
 
 
-    return account_mapping
+def get_vendor_accounts(api_key, vendor, cache_ttl=ACCOUNT_CACHE_TTL):
+    #vendor account list, served from the disk cache while it is fresh
+    cache_path = account_cache_path(api_key, vendor)
+    if cache_ttl and os.path.exists(cache_path) and time() - os.path.getmtime(cache_path) < cache_ttl:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    end_point = f'/vendors/{vendor}/accounts?viewId=0'
+    response = cldy.get(api_key=api_key, end_point=end_point)
+    if 'error' in response:
+        print(f'Error getting {vendor} accounts: {response["error"]}')
+        return []
+    results = response['result'] or []
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f)
+    os.replace(tmp_path, cache_path)
+    return results
+
+
+def get_acct_mapping(api_key, cache_ttl=ACCOUNT_CACHE_TTL):
+    vendors = get_vendors(api_key)
+
+    account_index = AccountIndex()
+    timer = time()
+    with ThreadPoolExecutor(max_workers=max(1, min(VENDOR_WORKERS, len(vendors)))) as executor:
+        futures = {executor.submit(get_vendor_accounts, api_key, vendor, cache_ttl): vendor for vendor in vendors}
+        for future in as_completed(futures):
+            vendor = futures[future]
+            for result in future.result():
+                account_index.add(vendor, result['vendorAccountId'], result['vendorAccountName'])
+
+    for name, ids in account_index.duplicate_names().items():
+        print(f'Warning: Duplicate account name found: {name} ({", ".join(ids)})')
+    print(f'Got {len(account_index)} accounts from {len(vendors)} vendors in {time() - timer} seconds.')
+    return account_index
 
 def get_ag_list(api_key):
     ag_endpoint = f'/account_groups/?auth_token={api_key}'
@@ -210,20 +399,57 @@ def get_ag_list(api_key):
     print(f'Got account group dimension list in {time() - timer} seconds. {len(ag_response)} found.')
     return ag_response
 
-def get_ag_entries(api_key, ag_response):
-    ag_entries_endpoint = f'/account_group_entries'
-
-    timer = time()
-    ag_entries_response = cldy.get(ag_entries_endpoint, api_key)
-    print(f'Got account group entries in {time() - timer} seconds. {len(ag_entries_response)} entries found.')
-
+def fetch_ag_entries_for_group(api_key, ag_id):
+    #asks the API for one AG's entries. Returns (entries, filtered) - entries is None if the
+    #request failed, filtered is False if the server ignored the filter and sent every entry
+    end_point = f'/account_group_entries?account_group_id={ag_id}'
+    response = cldy.get(end_point, api_key)
+    if not isinstance(response, list):
+        return None, False
+    filtered = all(str(entry['account_group_id']) == str(ag_id) for entry in response)
+    return response, filtered
+
+
+def iter_ag_entries(api_key, ag_ids=None):
+    #yields AG entries, filtered server side per AG when possible
+    if ag_ids:
+        # try the filter on one AG first, so a server that ignores it costs a single download
+        entries, filtered = fetch_ag_entries_for_group(api_key, ag_ids[0])
+        if entries is not None and not filtered:
+            print('Account group entry filter not supported. Filtering all entries locally.')
+            yield from entries
+            return
+        if filtered:
+            responses = [(entries, filtered)]
+            if len(ag_ids) > 1:
+                with ThreadPoolExecutor(max_workers=min(VENDOR_WORKERS, len(ag_ids) - 1)) as executor:
+                    responses += executor.map(lambda ag_id: fetch_ag_entries_for_group(api_key, ag_id), ag_ids[1:])
+            if all(filtered for _, filtered in responses):
+                for entries, _ in responses:
+                    yield from entries
+                return
+        print('Could not fetch account group entries per group. Fetching all entries.')
+    yield from cldy.get(f'/account_group_entries', api_key)
+
+
+def get_ag_entries(api_key, ag_response, account_ids=None, ag_names=None):
+    #account_ids / ag_names limit the result to what the csv references. None keeps everything
     account_groups = {}
     for ag in ag_response:
-        account_groups[ag['id']] = ag['name']
+        if ag_names is None or ag['name'] in ag_names:
+            account_groups[ag['id']] = ag['name']
+    wanted_accounts = None
+    if account_ids is not None:
+        wanted_accounts = {normalise_account_id(account_id) for account_id in account_ids}
 
+    timer = time()
+    fetched = 0
     account_group_entries = {}
-    for entry in ag_entries_response:
-        #removing hyphens to match account id format in rightsizing recs
+    ag_ids = list(account_groups) if ag_names is not None else None
+    if ag_ids == [] or wanted_accounts == set():
+        return account_group_entries
+    for entry in iter_ag_entries(api_key, ag_ids):
+        fetched += 1
         account_id = entry['account_identifier']
         ag_id = entry['account_group_id']
         if ag_id not in account_groups:
@@ -231,8 +457,9 @@ def get_ag_entries(api_key, ag_response):
             continue
 
         if account_id.isnumeric() and len(account_id) == 12:
-            print(account_id)
             account_id = format_aws_account_id(account_id)
+        if wanted_accounts is not None and normalise_account_id(account_id) not in wanted_accounts:
+            continue
         
         ag_name = account_groups[ag_id]
         if account_id not in account_group_entries:
@@ -240,6 +467,8 @@ def get_ag_entries(api_key, ag_response):
 
         account_group_entries[account_id][ag_name] = {'ag_id': ag_id, 'value': entry['value'], 'id': entry['id']}
 
+    kept = sum(len(entries) for entries in account_group_entries.values())
+    print(f'Got account group entries in {time() - timer} seconds. {fetched} entries fetched, {kept} kept.')
     return account_group_entries
 
 
@@ -252,7 +481,7 @@ def save_ag_entries_backup(ag_entries, ag_lookup):
             row[ag] = ''
             if ag in entries:
                 row[ag] = entries[ag]['value']
-            ag_entry_rows.append(row)
+        ag_entry_rows.append(row)
 
     # make sure a backups folder exists
     if not os.path.exists('backups'):
@@ -270,46 +499,167 @@ def save_ag_entries_backup(ag_entries, ag_lookup):
     
 
 
-def update_ag_entries(api_key, update_data):
-    #Updates AG entries based on changes found when comparing CSV to current Cldy information
+class AdaptiveRateLimiter:
+    """
+    Spaces requests from all workers so they share one request rate.
+
+    The rate creeps up while calls succeed and is halved on every 429, so the
+    run settles at the highest rate the API will sustain.
+    """
+
+    def __init__(self, rate=INITIAL_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.next_slot = time()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # reserve the next free slot under the lock, then wait for it outside it
+        with self.lock:
+            now = time()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + 1.0 / self.rate
+        wait = slot - time()
+        if wait > 0:
+            sleep(wait)
+
+    def success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + RATE_INCREASE)
+
+    def throttled(self, retry_after=None):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after else 1.0 / self.rate
+            self.next_slot = max(self.next_slot, time() + pause)
+
+
+def request_failed(result):
+    #cldy returns the decoded JSON on success and the requests Response for an error status
+    #(the same thing parse_and_print_bm_errors relies on). Some calls report {'error': ...} instead
+    status_code = getattr(result, 'status_code', None)
+    if status_code is not None:
+        return status_code >= 400
+    return isinstance(result, dict) and 'error' in result
+
+
+def is_rate_limited(result):
+    return getattr(result, 'status_code', None) == 429
+
+
+def get_retry_after(result):
+    #Retry-After may also be an HTTP date; fall back to the limiter's own pause for those
+    headers = getattr(result, 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def entry_action(data):
+    if data.get('delete'):
+        return 'delete'
+    return 'update' if data['id'] else 'create'
+
+
+def entry_key(data):
+    #identifies a change in the journal. New entries have no ID yet, so use account + AG
+    if data.get('delete'):
+        return f'delete:{data["id"]}'
+    if data.get('id'):
+        return f'put:{data["id"]}:{data["value"]}'
+    return f'post:{data["account_group_id"]}:{data["account_identifier"]}:{data["value"]}'
+
+
+def journal_path(api_key, journal_dir=JOURNAL_DIR):
+    #entry IDs are only unique within a tenant, so each API key gets its own journal
+    return os.path.join(journal_dir, f'ag_entries_journal_{api_key_hash(api_key)}.txt')
+
+
+def load_journal(journal_file, ttl=JOURNAL_TTL):
+    if not os.path.exists(journal_file):
+        return set()
+    if time() - os.path.getmtime(journal_file) >= ttl:
+        print(f'Ignoring journal {journal_file}: it is older than {ttl} seconds.')
+        os.remove(journal_file)
+        return set()
+    with open(journal_file, 'r', encoding='utf-8') as journal:
+        return {line.strip() for line in journal if line.strip()}
+
+
+def send_entry_request(api_key, data, limiter):
+    #makes one PUT/POST/DELETE, retrying through the shared limiter while the API answers 429
     end_point = f'/account_group_entries/'
-    # set min time between requests to avoid rate limiting
-    delay = 0.50 #time in secs
-    timer = time()
-    for data in update_data:
-        if data['id']:
-            ep = f'{end_point}{data["id"]}'
-            payload = {'value': data['value']}
-            result = cldy.put(ep, api_key, payload)
-            if 'error' not in result:
-                print(f'Updating value {data}')
-                print(result)
-            else:
-                print(result)
+    action = entry_action(data)
+    result = {}
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire()
+        if action == 'delete':
+            result = delete_ag_entry(api_key, data)
+        elif action == 'update':
+            result = cldy.put(f'{end_point}{data["id"]}', api_key, {'value': data['value']})
         else:
             result = cldy.post(end_point, api_key, data)
-            if 'error' not in result:
-                print(f'New value {data}')
-                print(result)
-            else:
+        if not request_failed(result):
+            limiter.success()
+            return True, result
+        if not is_rate_limited(result):
+            return False, result
+        limiter.throttled(get_retry_after(result))
+    return False, result
+
+
+def update_ag_entries(api_key, update_data, workers=UPDATE_WORKERS, journal_file=None):
+    #Updates, creates and deletes AG entries based on changes found when comparing CSV to current Cldy information
+    journal_file = journal_file or journal_path(api_key)
+    completed = load_journal(journal_file)
+    pending = [data for data in update_data if entry_key(data) not in completed]
+    if len(pending) < len(update_data):
+        print(f'Skipping {len(update_data) - len(pending)} entries already applied in a previous run.')
+
+    limiter = AdaptiveRateLimiter()
+    succeeded = {'update': 0, 'create': 0, 'delete': 0}
+    failed = {'update': 0, 'create': 0, 'delete': 0}
+    timer = time()
+    with open(journal_file, 'a', encoding='utf-8') as journal, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(send_entry_request, api_key, data, limiter): data for data in pending}
+        for future in as_completed(futures):
+            data = futures[future]
+            action = entry_action(data)
+            ok, result = future.result()
+            if not ok:
+                failed[action] += 1
+                print(f'Failed to {action} {data}')
                 print(result)
-                print(end_point)
-                print(data)
                 print('\t----')
-        time_diff = time() - timer #adding delay to avoid 429 time out errors
-        if time_diff < delay:
-            sleep(delay - time_diff)
-            timer = time()
+                continue
+            # only the main thread writes the journal, flushed so a crash keeps progress
+            journal.write(entry_key(data) + '\n')
+            journal.flush()
+            succeeded[action] += 1
+            if action == 'delete':
+                print(f'Deleted entry {data["value"]} for {data["account_identifier"]} {data["ag_name"]}')
+            elif action == 'update':
+                print(f'Updating value {data}')
+            else:
+                print(f'New value {data}')
 
-    return
+    print(f'Processed {len(pending)} entries in {time() - timer:.1f} seconds '
+          f'(final rate {limiter.rate:.1f} req/s).')
+    for action in ('update', 'create', 'delete'):
+        if succeeded[action] or failed[action]:
+            print(f'{action.capitalize()}: {succeeded[action]} succeeded, {failed[action]} failed')
+    if not any(failed.values()) and os.path.exists(journal_file):
+        os.remove(journal_file)
+    return {'succeeded': succeeded, 'failed': failed}
 
 def delete_ag_entry(api_key, entry):
     entry_id = entry['id']
-    #Deletes AG entry based on ID
+    #Deletes AG entry based on ID, returning the API result so callers can check for errors
     end_point = f'/account_group_entries/{entry_id}'
-    result = cldy.delete(end_point, api_key)
-    if 'error' not in result:
-        return True
+    return cldy.delete(end_point, api_key)
 
 def format_aws_account_id(id):
     #Format aws account Ids to have 0000-0000-0000, add leading 0s if needed
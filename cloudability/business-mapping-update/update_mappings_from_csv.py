@@ -5,11 +5,31 @@ SPDX-License-Identifier: Apache-2.0
 """
 
 import os
+import re
 import csv
 import sys
 import json
+import threading
+from time import time, sleep
+from concurrent.futures import ThreadPoolExecutor
 from apptio_lib import cloudability as cldy
 
+# X['name'] IN ('a', 'b', ...) - the statement shape make_mappings generates
+IN_EXPRESSION_PATTERN = re.compile(r"^\s*(\w+\[\s*'(?:[^'\\]|\\.)*'\s*\])\s+IN\s+\((.*)\)\s*$", re.DOTALL)
+QUOTED_VALUE_PATTERN = re.compile(r"'((?:[^'\\]|\\.)*)'")
+
+# Large IN lists are split so no single statement gets too big to upload or evaluate
+MAX_IN_LIST_SIZE = 1000
+MAX_PAYLOAD_BYTES = 1024 * 1024  # warn above this, the API rejects very large mappings
+
+# Independent mappings are uploaded in parallel, spaced out to stay under the API rate limit
+UPLOAD_WORKERS = 4
+UPLOAD_DELAY = 0.5  # min secs between requests across all workers
+
+# References the local expression check accepts, e.g. DIMENSION['vendor_account_identifier']
+EXPRESSION_REFERENCES = {'DIMENSION', 'TAG', 'BUSINESS_DIMENSION', 'ACCOUNT_TAG'}
+OPERATOR_CHARS = '=!<>@+-*/&|'
+
 def main():
     api_key = ''
     if len(sys.argv) >= 1:
@@ -29,38 +49,53 @@ def main():
         if '-test' in sys.argv:
             use_test_mapping = True
 
+    # -validate checks the csv mappings locally and stops, -novalidate sends them unchecked
+    validate_only = '-validate' in sys.argv
+    skip_validation = '-novalidate' in sys.argv or use_test_mapping
+
     new_mappings = {}
     if use_test_mapping:
         new_mappings = make_test_mappings()
 
     if not new_mappings:
         # We'll use every CSV in the current directory to make the mappings.
-        for file in os.listdir('.'):
-            file_mappings = {}
-            if file.endswith('.csv'):
-                print(f'Found CSV file: {file}')
-                with open(file, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    rows = list(reader)
-
-                headers = list(rows[0].keys())
-                match_dim = headers[0]
-                match_dim_type = 'DIMENSION'
-                bm_names = [headers[1]]
-                file_mappings = make_mappings(rows, match_dim, bm_names, match_dim_type)
-                break
+        # Files are grouped by their match column so values spread across several
+        # files are merged before any statements are built.
+        csv_sources = {}
+        for file in sorted(os.listdir('.')):
+            if not file.endswith('.csv'):
+                continue
+            print(f'Found CSV file: {file}')
+            with open(file, 'r', encoding='utf-8', newline='') as f:
+                headers = csv.DictReader(f).fieldnames
+            if not headers or len(headers) < 2:
+                print(f'{file} needs a match column and at least one mapping column. Skipping')
+                continue
+            # first column is what we match on, every other column is a mapping
+            files, bm_names = csv_sources.setdefault(headers[0], ([], []))
+            files.append(file)
+            bm_names.extend(name for name in headers[1:] if name not in bm_names)
 
+        match_dim_type = 'DIMENSION'
+        for match_dim, (files, bm_names) in csv_sources.items():
+            dim_mappings = make_mappings(iter_csv_rows(files), match_dim, bm_names, match_dim_type)
+
+            for bm_name, bm in dim_mappings.items():
+                # a mapping fed by different match columns needs statements for each of them
+                if bm_name in new_mappings:
+                    new_mappings[bm_name]['statements'].extend(bm['statements'])
+                else:
+                    new_mappings[bm_name] = bm
+
+    if not skip_validation:
+        invalid = validate_mappings(new_mappings)
+        for bm_name in invalid:
+            print(f'{bm_name} has invalid statements. Skipping')
+            del new_mappings[bm_name]
+        if validate_only:
+            print(f'{len(new_mappings)} mappings valid, {len(invalid)} invalid. No changes made to CLDY.')
+            return
 
-        for bm_name, bm in file_mappings.items():
-            # if the mapping already exists, merge the new values with the existing ones
-            if bm_name in new_mappings:
-                combined_statements = new_mappings[bm_name]['statements'] + bm['statements']
-                new_mappings[bm_name]['statements'] = combined_statements
-            else:
-                new_mappings[bm_name] = bm
-        
-        
-    
     # get current mappings from Cloudability
     current_mappings = {}
     if not debug:
@@ -69,47 +104,159 @@ def main():
         for mapping in current_mappings_result:
             current_mappings[mapping['name']] = mapping
 
-    for new_mapping in new_mappings.values():
-        if new_mapping['name'] in current_mappings:
-            current_mapping = current_mappings[new_mapping['name']]
-            if current_mapping.get('isReadOnly'):
-                print(f'{new_mapping["name"]} is read only. Skipping')
-                continue
-            if new_mapping['statements'] == current_mapping['statements']:
-                print(f'{new_mapping["name"]} matches. Skipping')
-                continue
-            print(f'Replacing {new_mapping["name"]} with new values')
-            index = current_mapping['index']
-            bm_ep = f'/business-mappings/{index}'
-            if debug:
-                bm_json = json.dumps(new_mapping, indent=4)
-                # check for Debug Files folder
-                if not os.path.exists('Debug Files'):
-                    os.makedirs('Debug Files')
-                with open(f'Debug Files/{new_mapping["name"]}.json', 'w') as f:
-                    f.write(bm_json)
-                print(f'Debug is on. No changes made to CLDY.')
-                print(f'File saved to Debug Files/{new_mapping["name"]}.json')
-            else:
-                response = cldy.put(bm_ep, api_key, new_mapping)
-        else:
-            print(f'No existing mapping found for {new_mapping["name"]}. Creating new mapping.')
-            if debug:
-                bm_json = json.dumps(new_mapping, indent=4)
-                # check for Debug Files folder
-                if not os.path.exists('Debug Files'):
-                    os.makedirs('Debug Files')
-                with open(f'Debug Files/{new_mapping["name"]}.json', 'w') as f:
-                    f.write(bm_json)
-                print(f'Debug is on. No changes made to CLDY.')
-                print(f'File saved to Debug Files/{new_mapping["name"]}.json')
-            else:
-                response = cldy.post('/business-mappings', api_key, new_mapping)
+    limiter = RequestSpacer(UPLOAD_DELAY)
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        results = list(executor.map(
+            lambda new_mapping: upload_mapping(api_key, new_mapping, current_mappings, debug, limiter),
+            new_mappings.values()))
+
+    print('')
+    for status in ('created', 'replaced', 'unchanged', 'skipped', 'failed'):
+        print(f'{status.capitalize()}: {results.count(status)}')
+
+
+class RequestSpacer:
+    # keeps a minimum gap between requests made from any thread
+    def __init__(self, delay):
+        self.delay = delay
+        self.next_time = time()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            slot = max(time(), self.next_time)
+            self.next_time = slot + self.delay
+        if slot > time():
+            sleep(slot - time())
+
+
+def save_debug_mapping(new_mapping):
+    bm_json = json.dumps(new_mapping, indent=4)
+    # check for Debug Files folder
+    os.makedirs('Debug Files', exist_ok=True)
+    with open(f'Debug Files/{new_mapping["name"]}.json', 'w') as f:
+        f.write(bm_json)
+    print(f'Debug is on. No changes made to CLDY.')
+    print(f'File saved to Debug Files/{new_mapping["name"]}.json')
+
+
+def upload_mapping(api_key, new_mapping, current_mappings, debug, limiter):
+    # creates or replaces one mapping. Returns created/replaced/unchanged/skipped/failed
+    if new_mapping['name'] in current_mappings:
+        current_mapping = current_mappings[new_mapping['name']]
+        if current_mapping.get('isReadOnly'):
+            print(f'{new_mapping["name"]} is read only. Skipping')
+            return 'skipped'
+        diff = diff_mapping(new_mapping, current_mapping)
+        if diff['identical']:
+            print(f'{new_mapping["name"]} matches. Skipping')
+            return 'unchanged'
+        print(f'Replacing {new_mapping["name"]} with new values')
+        print_mapping_diff(diff)
+        status = 'replaced'
+        if debug:
+            save_debug_mapping(new_mapping)
+            return status
+        index = current_mapping['index']
+        bm_ep = f'/business-mappings/{index}'
+        limiter.wait()
+        response = cldy.put(bm_ep, api_key, new_mapping)
+    else:
+        print(f'No existing mapping found for {new_mapping["name"]}. Creating new mapping.')
+        status = 'created'
+        if debug:
+            save_debug_mapping(new_mapping)
+            return status
+        limiter.wait()
+        response = cldy.post('/business-mappings', api_key, new_mapping)
+
+    if not isinstance(response, dict):
+        print(f'Error creating mapping: {new_mapping["name"]}')
+        # print(response)
+        cldy.parse_and_print_bm_errors(new_mapping, response)
+        return 'failed'
+    return status
+
+
+def statement_atoms(match_expression):
+    # IN lists are split into one (reference, value) pair per value so list order and
+    # whitespace don't matter. Anything else is compared as the whole expression.
+    match = IN_EXPRESSION_PATTERN.match(match_expression)
+    if not match:
+        return {('', match_expression.strip())}
+    reference = re.sub(r'\s+', '', match.group(1))
+    return {(reference, value) for value in QUOTED_VALUE_PATTERN.findall(match.group(2))}
+
+
+def canonical_statements(statements):
+    # valueExpression -> set of match atoms. Statements sharing a value are merged
+    canonical = {}
+    for statement in statements:
+        value = statement['valueExpression'].strip()
+        canonical.setdefault(value, set()).update(statement_atoms(statement['matchExpression']))
+    return canonical
+
+
+def has_overlapping_matches(canonical):
+    # the first matching statement wins in Cldy, so order matters once a match maps to 2 values
+    seen = set()
+    for atoms in canonical.values():
+        if seen & atoms:
+            return True
+        seen |= atoms
+    return False
 
-        if not debug and not isinstance(response, dict):
-            print(f'Error creating mapping: {new_mapping["name"]}')
-            # print(response)
-            cldy.parse_and_print_bm_errors(new_mapping, response)
+
+def diff_mapping(new_mapping, current_mapping):
+    new_statements = canonical_statements(new_mapping['statements'])
+    current_statements = canonical_statements(current_mapping['statements'])
+
+    added = sorted(set(new_statements) - set(current_statements))
+    removed = sorted(set(current_statements) - set(new_statements))
+    changed = {}
+    for value in sorted(set(new_statements) & set(current_statements)):
+        if new_statements[value] != current_statements[value]:
+            changed[value] = {
+                'added': new_statements[value] - current_statements[value],
+                'removed': current_statements[value] - new_statements[value]
+            }
+
+    default_changed = new_mapping.get('defaultValue') != current_mapping.get('defaultValue')
+    identical = not (added or removed or changed or default_changed)
+    if identical and (has_overlapping_matches(new_statements) or has_overlapping_matches(current_statements)):
+        # same pairs, but statement order decides which value wins, so compare it as well
+        identical = ([(s['matchExpression'], s['valueExpression']) for s in new_mapping['statements']] ==
+                     [(s['matchExpression'], s['valueExpression']) for s in current_mapping['statements']])
+
+    return {
+        'name': new_mapping['name'],
+        'identical': identical,
+        'added': added,
+        'removed': removed,
+        'changed': changed,
+        'default_changed': default_changed
+    }
+
+
+def print_mapping_diff(diff):
+    print(f'\t{len(diff["added"])} values added, {len(diff["removed"])} removed, {len(diff["changed"])} changed')
+    for value in diff['added']:
+        print(f'\t+ {value}')
+    for value in diff['removed']:
+        print(f'\t- {value}')
+    for value, change in diff['changed'].items():
+        print(f'\t~ {value}: {len(change["added"])} matches added, {len(change["removed"])} removed')
+    if diff['default_changed']:
+        print('\t~ defaultValue changed')
+    if not (diff['added'] or diff['removed'] or diff['changed'] or diff['default_changed']):
+        print('\tStatement order changed for overlapping matches')
+
+
+def iter_csv_rows(files):
+    # rows from each file in turn, so several CSVs can feed one make_mappings call
+    for file in files:
+        with open(file, 'r', encoding='utf-8', newline='') as f:
+            yield from csv.DictReader(f)
 
 
 def make_mappings(rows, match_dim, bm_names, match_dim_type):
@@ -124,6 +271,9 @@ def make_mappings(rows, match_dim, bm_names, match_dim_type):
             
             if bm_name == match_dim or bm_name not in bm_names:
                 continue
+            # DictReader fills missing trailing columns with None
+            if value is None:
+                value = ''
             if value not in bms[bm_name]:
                 bms[bm_name][value] = set()
             bms[bm_name][value].add(row[match_dim])
@@ -136,37 +286,178 @@ def make_mappings(rows, match_dim, bm_names, match_dim_type):
             "defaultValue": "(not set)",
             'statements': []
         }
-        for bm_value, match_list in bm_values.items():
-            match_list_str = "', '".join(match_list)
+        bm_values = dedupe_match_values(bm_name, bm_values)
+        # sorted values and match lists keep the payload stable between runs
+        for bm_value in sorted(bm_values):
+            match_list = sorted(bm_values[bm_value])
             if not bm_value:
                 print(f'WARNING: {len(match_list)} rows with no value for {bm_name}')
                 # print(', '.join(match_list))
                 continue
-            if "\\" in bm_value:
-                print(bm_value)
-                print(repr(bm_value))
-                print(repr(json.dumps(bm_value)))
-                # bm_value = bm_value.replace("\\", "\\\\")
-                print(repr(json.dumps(bm_value)))
-
-            if "'" in bm_value:
-                # escape single quotes with backslash
-                bm_value = bm_value.replace("'", "\\'")
-            statement = {
-                "matchExpression": f"{match_dim_type}['{match_dim}'] IN ('{match_list_str}')",
-                "valueExpression": f"'{bm_value}'"
-            }
-            if "\\" in bm_value:
-                print(json.dumps(statement))
-                exit()
-            
-            bm['statements'].append(statement)
+            bm_value = escape_expression_string(bm_value)
+            for match_chunk in chunk_list(match_list, MAX_IN_LIST_SIZE):
+                match_list_str = "', '".join(escape_expression_string(match) for match in match_chunk)
+                statement = {
+                    "matchExpression": f"{match_dim_type}['{match_dim}'] IN ('{match_list_str}')",
+                    "valueExpression": f"'{bm_value}'"
+                }
+                
+                bm['statements'].append(statement)
         
 
+        payload_size = estimate_payload_size(bm)
+        print(f'{bm_name}: {len(bm["statements"])} statements, ~{payload_size / 1024:.1f} KB')
+        if payload_size > MAX_PAYLOAD_BYTES:
+            print(f'WARNING: {bm_name} is larger than {MAX_PAYLOAD_BYTES // 1024} KB and may be rejected by the API')
         new_mappings[bm_name] = bm
     
     return new_mappings
                 
+def dedupe_match_values(bm_name, bm_values):
+    # Cldy uses the first statement that matches, so a match value listed under a later
+    # value can never be reached. Drop those so sorting the statements can't change results.
+    seen = set()
+    deduped = {}
+    duplicates = 0
+    for bm_value, match_set in bm_values.items():
+        if not bm_value:
+            deduped[bm_value] = match_set
+            continue
+        deduped[bm_value] = match_set - seen
+        duplicates += len(match_set) - len(deduped[bm_value])
+        seen |= match_set
+        if not deduped[bm_value]:
+            del deduped[bm_value]
+    if duplicates:
+        print(f'WARNING: {duplicates} match values in {bm_name} map to more than one value. Keeping the first')
+    return deduped
+
+
+def chunk_list(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def estimate_payload_size(mapping):
+    # bytes the mapping will take as a request body
+    return len(json.dumps(mapping).encode('utf-8'))
+
+
+def escape_expression_string(value):
+    # backslashes first, so the ones added for quotes aren't doubled
+    return value.replace('\\', '\\\\').replace("'", "\\'")
+
+
+def tokenize_expression(expression):
+    # returns (tokens, errors). tokens are (kind, text, column) with 1 based columns
+    tokens = []
+    errors = []
+    i = 0
+    while i < len(expression):
+        char = expression[i]
+        if char.isspace():
+            i += 1
+        elif char == "'":
+            start = i
+            i += 1
+            while i < len(expression) and expression[i] != "'":
+                i += 2 if expression[i] == '\\' else 1
+            if i >= len(expression):
+                errors.append((start + 1, 'unterminated string'))
+                break
+            tokens.append(('STRING', expression[start:i + 1], start + 1))
+            i += 1
+        elif char in '()[],':
+            tokens.append((char, char, i + 1))
+            i += 1
+        elif char.isalnum() or char in '_.':
+            start = i
+            while i < len(expression) and (expression[i].isalnum() or expression[i] in '_.'):
+                i += 1
+            tokens.append(('WORD', expression[start:i], start + 1))
+        elif char in OPERATOR_CHARS:
+            start = i
+            while i < len(expression) and expression[i] in OPERATOR_CHARS:
+                i += 1
+            tokens.append(('OP', expression[start:i], start + 1))
+        else:
+            errors.append((i + 1, f'unexpected character {char!r}'))
+            i += 1
+    return tokens, errors
+
+
+def validate_expression(expression):
+    # Light check of the BM grammar: quoting, brackets, references and IN lists.
+    # Returns a list of (column, message); empty means nothing obviously wrong.
+    if not expression or not expression.strip():
+        return [(1, 'empty expression')]
+    tokens, errors = tokenize_expression(expression)
+
+    closing = {')': '(', ']': '['}
+    stack = []
+    for kind, text, column in tokens:
+        if kind in '([':
+            stack.append((kind, column))
+        elif kind in ')]':
+            if not stack or stack[-1][0] != closing[kind]:
+                errors.append((column, f'unmatched {text!r}'))
+            else:
+                stack.pop()
+    for kind, column in stack:
+        errors.append((column, f'unclosed {kind!r}'))
+
+    in_list = set()  # token positions inside IN lists, checked by the IN rule only
+    for i, (kind, text, column) in enumerate(tokens):
+        following = tokens[i + 1:i + 4]
+        if kind == 'WORD' and following and following[0][0] == '[':
+            if text not in EXPRESSION_REFERENCES:
+                errors.append((column, f'unknown reference {text}'))
+            if [token[0] for token in following] != ['[', 'STRING', ']']:
+                errors.append((column, f"{text} reference should look like {text}['name']"))
+        elif kind == 'WORD' and text.upper() == 'IN':
+            if not following or following[0][0] != '(':
+                errors.append((column, 'IN must be followed by a list in brackets'))
+                continue
+            expect_value = True
+            for position in range(i + 2, len(tokens)):
+                item_kind, item_text, item_column = tokens[position]
+                in_list.add(position)
+                if item_kind == ')':
+                    if expect_value:
+                        errors.append((item_column, 'empty or trailing comma in IN list'))
+                    break
+                # report the first problem in a list only, the rest usually follow from it
+                if expect_value and item_kind != 'STRING':
+                    errors.append((item_column, f'IN list value {item_text} must be quoted'))
+                    break
+                if not expect_value and item_kind != ',':
+                    errors.append((item_column, f'missing comma before {item_text}'))
+                    break
+                expect_value = not expect_value
+        elif kind == 'STRING' and i not in in_list and i + 1 < len(tokens) and tokens[i + 1][0] == 'STRING':
+            errors.append((tokens[i + 1][2], 'missing comma or operator between strings'))
+
+    return sorted(set(errors))
+
+
+def validate_mappings(mappings):
+    # checks every statement locally and prints errors the way parse_and_print_bm_errors does.
+    # Returns {mapping name: error count} for mappings that failed
+    invalid = {}
+    for bm_name, mapping in mappings.items():
+        for statement_number, statement in enumerate(mapping['statements'], start=1):
+            for key in ('matchExpression', 'valueExpression'):
+                value = statement.get(key, '')
+                for column, message in validate_expression(value):
+                    invalid[bm_name] = invalid.get(bm_name, 0) + 1
+                    print(f'{bm_name}: error in statement: {statement_number}')
+                    print(f'Error in {key} at column {column}: {message}')
+                    print(f'"{key}": "{value}"')
+                    # print carrot under the error
+                    print(' ' * (column - 1 + len(key) + 5) + '^')
+    return invalid
+
+
 def make_test_mappings():
     # mapping with purposefully bad matchExpression and valueExpression to test error handling
     # if you use a working BM it will be uploaded to CLDY, so be careful!
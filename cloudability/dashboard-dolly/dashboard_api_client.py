@@ -5,6 +5,7 @@ Handles authentication and API requests for Cloudability dashboards.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 import json
 from typing import Dict, List, Optional, Any
@@ -13,6 +14,9 @@ import urllib3
 # Disable SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Pooled keep-alive connections, sized for concurrent dashboard exports
+POOL_SIZE = 8
+
 
 class DashboardAPIClient:
     """API client for Cloudability dashboard operations."""
@@ -36,6 +40,7 @@ class DashboardAPIClient:
         self.base_url = f"https://api{self.region}.cloudability.com/v3"
         self.session = requests.Session()
         self.session.verify = False
+        self.session.mount('https://', HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE))
         
         if auth_type == "cloudability" and api_key:
             self.session.auth = HTTPBasicAuth(api_key, '')
@@ -12,8 +12,15 @@ import csv
 import re
 import sys
 import json
+import time
+import hashlib
+import threading
+import tempfile
 import requests
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, List, Optional
 import urllib3
 
 # Disable SSL warnings
@@ -39,6 +46,17 @@ measure_mapping = {}
 DB_JSON_FOLDER = 'Dashboards_to_Upload'
 ENV_ROOT = 'Environments'
 
+# Dashboard export settings
+SAVE_WORKERS = 8
+SAVE_REQUEST_DELAY = 0.1  # Minimum seconds between dashboard requests across all workers
+SAVE_RETRIES = 3
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+DASHBOARD_PAGE_SIZE = 500
+MANIFEST_FILE = '.dashboards_manifest.json'
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
 
 def get_layers_from_widget(widget):
     """Apply measure mappings to widget layers."""
@@ -120,10 +138,11 @@ def get_dashboard(id, api_key=None, opentoken_headers=None, region=''):
         return get_request(ep, api_key=api_key, headers=opentoken_headers)
 
 
-def get_dashboard_list(api_key=None, opentoken_headers=None, region=''):
-    """Get list of all dashboards."""
+def get_dashboard_list(api_key=None, opentoken_headers=None, region='', offset=0):
+    """Get one page of the dashboard list."""
     region_str = format_region(region)
-    ep = f'https://api{region_str}.cloudability.com/v3/internal/dashboards?limit=500&skip_shared_dimension_filter_set_ids=true&use_basic_user=true'
+    ep = (f'https://api{region_str}.cloudability.com/v3/internal/dashboards?limit={DASHBOARD_PAGE_SIZE}'
+          f'&offset={offset}&skip_shared_dimension_filter_set_ids=true&use_basic_user=true')
     
     if APPTIO_LIB_AVAILABLE:
         return cldy.get(ep, api_key=api_key, opentoken_headers=opentoken_headers)
@@ -131,11 +150,47 @@ def get_dashboard_list(api_key=None, opentoken_headers=None, region=''):
         return get_request(ep, api_key=api_key, headers=opentoken_headers)
 
 
-def save_dashboards(api_key='', headers={}, region='', customer_name='', starred_only=False):
-    """Save dashboards to files."""
-    dashboards = get_dashboard_list(api_key=api_key, opentoken_headers=headers, region=region)
+def get_all_dashboards(api_key=None, opentoken_headers=None, region=''):
+    """
+    Page through the full dashboard list.
+
+    Returns:
+        Tuple of (dashboards, complete). complete is False when the whole list could not
+        be confirmed (a page failed or the API ignored the offset), so dashboards missing
+        from it must not be treated as deleted.
+    """
+    dashboards = []
+    seen_ids = set()
+    while True:
+        page = get_dashboard_list(api_key=api_key, opentoken_headers=opentoken_headers,
+                                  region=region, offset=len(dashboards))
+        if not isinstance(page, list):
+            print(f'Could not fetch the dashboard list after {len(dashboards)} dashboards: {page}')
+            return dashboards, False
+        new = [d for d in page if str(d['id']) not in seen_ids]
+        seen_ids.update(str(d['id']) for d in new)
+        dashboards.extend(new)
+        if len(new) < len(page):
+            print('Warning: the dashboard list repeated a page, so it may be incomplete')
+            return dashboards, False
+        if len(page) < DASHBOARD_PAGE_SIZE:
+            return dashboards, True
+
+
+def save_dashboards(api_key='', headers={}, region='', customer_name='', starred_only=False,
+                    workers=SAVE_WORKERS, incremental=False):
+    """
+    Save dashboards to files.
+
+    A manifest in the save folder records what each saved dashboard looked like in the
+    dashboard list. With incremental=True only dashboards whose list entry changed since
+    the last save are fetched again. Dashboards that no longer exist are recorded as
+    deleted in the manifest; their files are kept.
+    """
+    dashboards, complete = get_all_dashboards(api_key=api_key, opentoken_headers=headers, region=region)
     print(f'Found {len(dashboards)} dashboards for {customer_name}')
     unfiltered_count = len(dashboards)
+    all_dashboards = dashboards
     
     if starred_only:
         dashboards = [d for d in dashboards if d.get('star', False)]
@@ -148,31 +203,278 @@ def save_dashboards(api_key='', headers={}, region='', customer_name='', starred
     if not os.path.exists(save_dir):
         os.makedirs(save_dir)
 
-    saved_count = 0
-    total_count = len(dashboards)
-    
-    for dashboard_info in dashboards:
-        id = dashboard_info['id']
-        name = dashboard_info['name']
-        
-        # Get full dashboard json
-        dashboard = get_dashboard(id, api_key=api_key, opentoken_headers=headers, region=region)
-        db_save_name = f'{id}-{name}.json'
-    
-        # Sanitize dashboard name for filename
-        db_save_name = re.sub(r'[\\/*?:"<>|]', '', db_save_name)
-        db_save_name = re.sub(r'\s+', '_', db_save_name)
-        filename = f"{save_dir}/{db_save_name}"
-        
-        with open(filename, 'w') as f:
-            json.dump(dashboard, f, indent=4)
-        
-        saved_count += 1
-        percent_complete = (saved_count / total_count) * 100
-        sys.stdout.write(f"\rSaving dashboards: {percent_complete:.0f}% Complete ({saved_count}/{total_count})")
+    manifest = load_manifest(save_dir)
+    if complete:
+        deleted = record_deleted_dashboards(manifest, all_dashboards)
+        if deleted:
+            print(f'{len(deleted)} dashboards were deleted since the last save and are marked in the manifest')
+    else:
+        print('Warning: the dashboard list may be incomplete, so no dashboards are marked as deleted')
+
+    if incremental:
+        dashboards, unchanged = split_changed_dashboards(dashboards, manifest, save_dir)
+        print(f'{len(unchanged)} dashboards unchanged since the last save, {len(dashboards)} to fetch')
+        if not dashboards:
+            save_manifest(save_dir, manifest)
+            return
+
+    def print_progress(done, total, dashboard_info, error):
+        if error:
+            sys.stdout.write(f"\nError saving {dashboard_info['name']}: {error}\n")
+        percent_complete = (done / total) * 100
+        sys.stdout.write(f"\rSaving dashboards: {percent_complete:.0f}% Complete ({done}/{total})")
         sys.stdout.flush()
 
+    saved_count, errors = export_dashboards(
+        dashboards,
+        lambda id: get_dashboard(id, api_key=api_key, opentoken_headers=headers, region=region),
+        save_dir,
+        workers=workers,
+        on_progress=print_progress,
+    )
+
+    for dashboard_info in dashboards:
+        if dashboard_info['id'] not in errors:
+            update_manifest_entry(manifest, dashboard_info, save_dir)
+    save_manifest(save_dir, manifest)
+
     print(f'\nSaved {saved_count} dashboards to {save_dir}')
+    if errors:
+        print(f'Failed to save {len(errors)} dashboards')
+
+
+def dashboard_fingerprint(dashboard_info):
+    """
+    Summarise a dashboard list entry so changes can be spotted without fetching it.
+
+    Returns:
+        Hash of updated_at, name and widget list/count, or None when the list entry has
+        no change marker (then the dashboard is always fetched)
+    """
+    updated_at = dashboard_info.get('updated_at', dashboard_info.get('updatedAt'))
+    widgets = dashboard_info.get('widgets', dashboard_info.get('widget_count'))
+    if updated_at is None and widgets is None:
+        return None
+    summary = {'name': dashboard_info.get('name'), 'updated_at': updated_at, 'widgets': widgets}
+    return hashlib.sha256(json.dumps(summary, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def load_manifest(save_dir):
+    """Load the save folder's manifest, or an empty one."""
+    manifest_path = os.path.join(save_dir, MANIFEST_FILE)
+    manifest = {'dashboards': {}, 'deleted': {}}
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest.update(json.load(f))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f'Could not read {manifest_path}, starting a new one: {e}')
+    return manifest
+
+
+def save_manifest(save_dir, manifest):
+    write_json_atomic(os.path.join(save_dir, MANIFEST_FILE), manifest, indent=2)
+
+
+def split_changed_dashboards(dashboards, manifest, save_dir):
+    """Return (changed, unchanged) dashboard list entries, compared against the manifest."""
+    changed = []
+    unchanged = []
+    for dashboard_info in dashboards:
+        entry = manifest['dashboards'].get(str(dashboard_info['id']))
+        fingerprint = dashboard_fingerprint(dashboard_info)
+        if (entry and fingerprint and entry.get('fingerprint') == fingerprint
+                and os.path.exists(os.path.join(save_dir, entry['file']))):
+            unchanged.append(dashboard_info)
+        else:
+            changed.append(dashboard_info)
+    return changed, unchanged
+
+
+def update_manifest_entry(manifest, dashboard_info, save_dir):
+    """Record a freshly saved dashboard, removing its old file if it was renamed."""
+    key = str(dashboard_info['id'])
+    filename = dashboard_filename(dashboard_info['id'], dashboard_info['name'])
+    previous = manifest['dashboards'].get(key)
+    if previous and previous['file'] != filename:
+        old_path = os.path.join(save_dir, previous['file'])
+        if os.path.exists(old_path):
+            os.remove(old_path)
+    manifest['dashboards'][key] = {
+        'name': dashboard_info['name'],
+        'file': filename,
+        'updated_at': dashboard_info.get('updated_at', dashboard_info.get('updatedAt')),
+        'fingerprint': dashboard_fingerprint(dashboard_info),
+        'saved_at': datetime.now(timezone.utc).isoformat(),
+    }
+    manifest['deleted'].pop(key, None)
+
+
+def record_deleted_dashboards(manifest, all_dashboards):
+    """Move manifest entries for dashboards missing from the full list to 'deleted'."""
+    current_ids = {str(d['id']) for d in all_dashboards}
+    deleted = [key for key in manifest['dashboards'] if key not in current_ids]
+    for key in deleted:
+        entry = manifest['dashboards'].pop(key)
+        entry['deleted_at'] = datetime.now(timezone.utc).isoformat()
+        manifest['deleted'][key] = entry
+    return deleted
+
+
+def dashboard_filename(id, name):
+    """Build a safe file name for a saved dashboard."""
+    db_save_name = f'{id}-{name}.json'
+    # Sanitize dashboard name for filename
+    db_save_name = re.sub(r'[\\/*?:"<>|]', '', db_save_name)
+    return re.sub(r'\s+', '_', db_save_name)
+
+
+def write_json_atomic(filepath, data, indent=4):
+    """Write JSON to a temp file and move it into place, so a crash never leaves a half written file."""
+    directory = os.path.dirname(filepath) or '.'
+    tmp_fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(tmp_fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class RequestSpacer:
+    """Keeps a minimum gap between requests made from any thread."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.next_time = time.time()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            slot = max(time.time(), self.next_time)
+            self.next_time = slot + self.delay
+        if slot > time.time():
+            time.sleep(slot - time.time())
+
+
+def _is_error_response(result):
+    """Whether a fetch result is a failure (cldy.get returns the Response for an error status)."""
+    if isinstance(result, dict):
+        return 'error' in result
+    status_code = getattr(result, 'status_code', None)
+    return isinstance(status_code, int) and status_code >= 400
+
+
+def _is_retryable(error):
+    """Whether a failed fetch is worth trying again (rate limits, server errors, dropped connections)."""
+    if isinstance(error, requests.exceptions.HTTPError):
+        return getattr(error.response, 'status_code', None) in RETRY_STATUS_CODES
+    if isinstance(error, requests.exceptions.RequestException):
+        return True
+    if isinstance(error, dict):
+        return error.get('status_code') in RETRY_STATUS_CODES
+    return getattr(error, 'status_code', None) in RETRY_STATUS_CODES
+
+
+def _retry_after(error):
+    """Seconds from a Retry-After header on a failed fetch, or None."""
+    # error Responses are falsy, so compare with None rather than using `or`
+    response = getattr(error, 'response', None)
+    if response is None:
+        response = error
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return max(0.0, float(headers.get('Retry-After')))
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_with_retries(fetch, id, limiter, retries=SAVE_RETRIES):
+    """
+    Fetch one dashboard, retrying rate limited and transient failures with backoff.
+
+    Args:
+        fetch: Callable taking a dashboard ID and returning the dashboard JSON
+        id: Dashboard ID
+        limiter: Shared RequestSpacer
+        retries: Number of retries after the first attempt
+
+    Returns:
+        Dashboard dictionary
+
+    Raises:
+        Exception: The last error once retries are used up
+    """
+    for attempt in range(retries + 1):
+        limiter.wait()
+        try:
+            dashboard = fetch(id)
+            if _is_error_response(dashboard):
+                error = dashboard
+            else:
+                return dashboard
+        except Exception as e:
+            error = e
+        if attempt == retries or not _is_retryable(error):
+            break
+        retry_after = _retry_after(error)
+        time.sleep(retry_after if retry_after is not None else 2 ** attempt)
+    if isinstance(error, dict):
+        raise RuntimeError(error.get('error'))
+    if not isinstance(error, Exception):
+        raise RuntimeError(f'HTTP {error.status_code} fetching dashboard {id}')
+    raise error
+
+
+def export_dashboards(dashboard_infos: List[Dict], fetch: Callable, save_dir: str,
+                      workers: int = SAVE_WORKERS, on_progress: Optional[Callable] = None,
+                      indent: int = 4):
+    """
+    Fetch full dashboards concurrently and save each one as JSON.
+
+    Args:
+        dashboard_infos: Dashboards from the dashboard list (need 'id' and 'name')
+        fetch: Callable taking a dashboard ID and returning the dashboard JSON
+        save_dir: Folder to write the JSON files to
+        workers: Number of dashboards fetched at once
+        on_progress: Called as on_progress(done, total, dashboard_info, error) after each
+            dashboard. Calls are serialised, so it doesn't need its own locking.
+        indent: JSON indent for the saved files
+
+    Returns:
+        Tuple of (saved count, {dashboard id: error message})
+    """
+    limiter = RequestSpacer(SAVE_REQUEST_DELAY)
+    total = len(dashboard_infos)
+    saved_count = 0
+    errors = {}
+    progress_lock = threading.Lock()
+
+    def save_one(dashboard_info):
+        dashboard = fetch_with_retries(fetch, dashboard_info['id'], limiter)
+        filepath = os.path.join(save_dir, dashboard_filename(dashboard_info['id'], dashboard_info['name']))
+        write_json_atomic(filepath, dashboard, indent=indent)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(save_one, info): info for info in dashboard_infos}
+        for future in as_completed(futures):
+            dashboard_info = futures[future]
+            error = None
+            try:
+                future.result()
+            except Exception as e:
+                error = str(e)
+            with progress_lock:
+                if error:
+                    errors[dashboard_info['id']] = error
+                else:
+                    saved_count += 1
+                if on_progress:
+                    on_progress(saved_count + len(errors), total, dashboard_info, error)
+
+    return saved_count, errors
 
 
 def make_dashboard(name, api_key=None, opentoken_headers=None, region=''):
@@ -195,7 +497,7 @@ def load_dbs_from_folder(folder):
         return dashboards
 
     for filename in os.listdir(folder):
-        if filename.endswith('.json'):
+        if filename.endswith('.json') and not filename.startswith('.'):  # skip the save manifest
             filepath = os.path.join(folder, filename)
             with open(filepath, 'r') as f:
                 try:
@@ -259,17 +561,30 @@ def format_region(region):
     return f'-{region}'
 
 
+def get_session(api_key=None, headers=None):
+    """Return a shared keep-alive session for these credentials."""
+    key = (api_key, tuple(sorted((headers or {}).items())))
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            session.verify = False
+            # Enough pooled connections for every save worker to reuse one
+            adapter = HTTPAdapter(pool_connections=SAVE_WORKERS, pool_maxsize=SAVE_WORKERS)
+            session.mount('https://', adapter)
+            
+            if api_key:
+                from requests.auth import HTTPBasicAuth
+                session.auth = HTTPBasicAuth(api_key, '')
+            elif headers:
+                session.headers.update(headers)
+            _sessions[key] = session
+    return session
+
+
 def get_request(url, api_key=None, headers=None):
     """Make a GET request."""
-    session = requests.Session()
-    session.verify = False
-    
-    if api_key:
-        from requests.auth import HTTPBasicAuth
-        session.auth = HTTPBasicAuth(api_key, '')
-    elif headers:
-        session.headers.update(headers)
-    
+    session = get_session(api_key, headers)
     response = session.get(url, timeout=30)
     response.raise_for_status()
     return response.json()
@@ -277,15 +592,7 @@ def get_request(url, api_key=None, headers=None):
 
 def post_request(url, data, api_key=None, headers=None):
     """Make a POST request."""
-    session = requests.Session()
-    session.verify = False
-    
-    if api_key:
-        from requests.auth import HTTPBasicAuth
-        session.auth = HTTPBasicAuth(api_key, '')
-    elif headers:
-        session.headers.update(headers)
-    
+    session = get_session(api_key, headers)
     response = session.post(url, json=data, headers={'Content-Type': 'application/json'}, timeout=30)
     response.raise_for_status()
     return response.json()
@@ -370,7 +677,9 @@ def main():
         
         if mode == '1':
             starred_only = input('Do you want to save only starred dashboards? (y/n): ').strip().lower() == 'y'
-            save_dashboards(api_key, headers, region=region, customer_name=customer_folder_name, starred_only=starred_only)
+            incremental = input('Only save dashboards changed since the last save? (y/n): ').strip().lower() == 'y'
+            save_dashboards(api_key, headers, region=region, customer_name=customer_folder_name,
+                            starred_only=starred_only, incremental=incremental)
         elif mode == '2':
             upload_dashboards(api_key=api_key, headers=headers, region=region)
         elif mode == '3':
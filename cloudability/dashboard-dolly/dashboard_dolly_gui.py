@@ -490,29 +490,23 @@ class DashboardDollyGUI:
         self.status_var.set("Saving dashboards...")
         
         def save_thread():
-            saved_count = 0
             total = len(self.selected_dashboards)
             
-            for i, db_info in enumerate(self.selected_dashboards):
-                try:
-                    dashboard = self.source_client.get_dashboard(db_info['id'])
-                    
-                    import re
-                    filename = f"{db_info['id']}-{db_info['name']}.json"
-                    filename = re.sub(r'[\\/*?:"<>|]', '', filename)
-                    filename = re.sub(r'\s+', '_', filename)
-                    
-                    filepath = os.path.join(directory, filename)
-                    with open(filepath, 'w') as f:
-                        json.dump(dashboard, f, indent=2)
-                    
-                    saved_count += 1
-                    progress = (i + 1) / total * 100
-                    self.root.after(0, lambda p=progress: self.progress_var.set(p))
-                    
-                except Exception as e:
-                    self.root.after(0, lambda e=e, name=db_info['name']: 
+            def report_progress(done, total, db_info, error):
+                # Called from the worker pool; hand everything to the Tk thread
+                if error:
+                    self.root.after(0, lambda e=error, name=db_info['name']: 
                                   self.log(f"Error saving {name}: {e}", "error"))
+                progress = done / total * 100
+                self.root.after(0, lambda p=progress: self.progress_var.set(p))
+            
+            saved_count, _ = dd.export_dashboards(
+                list(self.selected_dashboards),
+                self.source_client.get_dashboard,
+                directory,
+                on_progress=report_progress,
+                indent=2,
+            )
             
             self.root.after(0, lambda: self.log(f"Saved {saved_count}/{total} dashboards", "success"))
             self.root.after(0, lambda: self.status_var.set(f"Saved {saved_count}/{total} dashboards"))
@@ -631,7 +625,7 @@ class DashboardDollyGUI:
         
         dashboards = []
         for filename in os.listdir(directory):
-            if filename.endswith('.json'):
+            if filename.endswith('.json') and not filename.startswith('.'):  # skip the save manifest
                 filepath = os.path.join(directory, filename)
                 try:
                     with open(filepath, 'r') as f:
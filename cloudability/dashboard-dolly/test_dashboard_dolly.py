@@ -0,0 +1,71 @@
+"""
+Tests for dashboard export retries, run without a Cloudability connection
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import pytest
+import requests
+
+import dashboard_dolly
+from dashboard_dolly import RequestSpacer, fetch_with_retries
+
+
+def make_response(status_code, headers=None):
+    """Build the requests.Response cldy.get hands back for an error status"""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    return response
+
+
+def test_rate_limited_response_is_retried(monkeypatch):
+    """A 429 Response is retried after its Retry-After delay instead of being saved"""
+    sleeps = []
+    monkeypatch.setattr(dashboard_dolly.time, 'sleep', sleeps.append)
+    results = [make_response(429, {'Retry-After': '7'}), {'id': 1, 'name': 'Costs'}]
+    
+    dashboard = fetch_with_retries(lambda id: results.pop(0), 1, RequestSpacer(0))
+    
+    assert dashboard == {'id': 1, 'name': 'Costs'}
+    assert sleeps == [7.0]
+
+
+def test_client_error_response_is_not_retried(monkeypatch):
+    """A 404 Response fails straight away"""
+    calls = []
+    monkeypatch.setattr(dashboard_dolly.time, 'sleep', lambda seconds: None)
+    
+    def fetch(id):
+        calls.append(id)
+        return make_response(404)
+    
+    with pytest.raises(RuntimeError, match='404'):
+        fetch_with_retries(fetch, 1, RequestSpacer(0))
+    assert calls == [1]
+
+
+def test_dashboard_list_is_paged(monkeypatch):
+    """Every page of the dashboard list is fetched before deletions are worked out"""
+    monkeypatch.setattr(dashboard_dolly, 'DASHBOARD_PAGE_SIZE', 2)
+    pages = {0: [{'id': 1}, {'id': 2}], 2: [{'id': 3}, {'id': 4}], 4: [{'id': 5}]}
+    monkeypatch.setattr(dashboard_dolly, 'get_dashboard_list',
+                        lambda offset=0, **kwargs: pages[offset])
+    
+    dashboards, complete = dashboard_dolly.get_all_dashboards()
+    
+    assert [d['id'] for d in dashboards] == [1, 2, 3, 4, 5]
+    assert complete
+
+
+def test_ignored_offset_leaves_list_incomplete(monkeypatch):
+    """If the API ignores the offset, the list isn't trusted for deletions"""
+    monkeypatch.setattr(dashboard_dolly, 'DASHBOARD_PAGE_SIZE', 2)
+    monkeypatch.setattr(dashboard_dolly, 'get_dashboard_list',
+                        lambda offset=0, **kwargs: [{'id': 1}, {'id': 2}])
+    
+    dashboards, complete = dashboard_dolly.get_all_dashboards()
+    
+    assert [d['id'] for d in dashboards] == [1, 2]
+    assert not complete
@@ -36,65 +36,323 @@ Usage:
     # List clusters across all regions
     python get_redshift_nodes.py --all-regions
 
+    # Scan all regions with 20 parallel workers and a 15 second per-region timeout
+    python get_redshift_nodes.py --all-regions --workers 20 --region-timeout 15
+
+    # Ignore cached results and query AWS again
+    python get_redshift_nodes.py --all-regions --refresh
+
+    # Scan every account in the AWS Organization through a role present in each account
+    python get_redshift_nodes.py --all-regions --org-role-name OrganizationAccountAccessRole
+
+    # Scan specific accounts through assumed roles
+    python get_redshift_nodes.py --all-regions --role-arns arn:aws:iam::111111111111:role/RedshiftRead arn:aws:iam::222222222222:role/RedshiftRead
+
+    # Join with Cloudability Redshift costs for per-node cost metrics
+    export CLOUDABILITY_API_KEY="your-cloudability-api-key"
+    python get_redshift_nodes.py --all-regions --with-costs --start-date 2026-04-01 --end-date 2026-04-30 --output costs.json
+
 For detailed AWS credentials setup, see: AWS_CREDENTIALS_SETUP.md
 """
 
 import boto3
+import requests
 import json
 import argparse
-from datetime import datetime
-from typing import List, Dict, Optional
+import os
+import threading
+import time
+from botocore.config import Config
+from botocore.credentials import RefreshableCredentials
+from botocore.session import get_session as get_botocore_session
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+from itertools import product
+from typing import List, Dict, Iterator, Optional, Tuple
+
+
+# Defaults for the parallel all-regions scan
+DEFAULT_WORKERS = 10
+DEFAULT_REGION_TIMEOUT = 30
+
+# Shared session and per-region clients (boto3 clients are thread-safe, sessions are not)
+_session = None
+_clients = {}
+_clients_lock = threading.Lock()
+
+# Sessions for assumed roles, keyed by role ARN. Credentials refresh automatically before expiry.
+ROLE_SESSION_NAME = 'apptio-tools-redshift-scan'
+ROLE_SESSION_DURATION = 3600
+_role_sessions = {}
+
+# Local cluster cache, keyed by account and region (see configure_cache)
+DEFAULT_CACHE_DIR = '.redshift_cache'
+DEFAULT_CACHE_TTL = 3600
+_cache_settings = {'dir': DEFAULT_CACHE_DIR, 'ttl': DEFAULT_CACHE_TTL, 'refresh': False}
+_account_id = None
+
+# Cloudability reporting API (Redshift cost rows are joined to clusters by identifier)
+DEFAULT_CLOUDABILITY_URL = 'https://api.cloudability.com'
+COST_PAGE_SIZE = 10000
+REDSHIFT_SERVICE_NAME = 'Amazon Redshift'
+
+
+def _assume_role(role_arn: str) -> Dict:
+    """
+    Assume a role with the base credentials.
+    
+    Returns:
+        Credential metadata in the format RefreshableCredentials expects
+    """
+    sts = get_client('sts', get_session().region_name or 'us-east-1')
+    credentials = sts.assume_role(
+        RoleArn=role_arn,
+        RoleSessionName=ROLE_SESSION_NAME,
+        DurationSeconds=ROLE_SESSION_DURATION
+    )['Credentials']
+    return {
+        'access_key': credentials['AccessKeyId'],
+        'secret_key': credentials['SecretAccessKey'],
+        'token': credentials['SessionToken'],
+        'expiry_time': credentials['Expiration'].isoformat()
+    }
+
+
+def _create_role_session(role_arn: str) -> boto3.Session:
+    """Create a boto3 session whose credentials come from (and are refreshed by) assume_role."""
+    credentials = RefreshableCredentials.create_from_metadata(
+        metadata=_assume_role(role_arn),
+        refresh_using=lambda: _assume_role(role_arn),
+        method='sts-assume-role'
+    )
+    botocore_session = get_botocore_session()
+    botocore_session._credentials = credentials
+    return boto3.Session(botocore_session=botocore_session, region_name=get_session().region_name)
+
+
+def get_session(role_arn: Optional[str] = None) -> boto3.Session:
+    """
+    Get the shared boto3 session used for all clients.
+    
+    Args:
+        role_arn: Optional role to assume; its session is created once and reused
+        
+    Returns:
+        boto3 session
+    """
+    global _session
+    with _clients_lock:
+        if _session is None:
+            _session = boto3.Session()
+        if not role_arn:
+            return _session
+        if role_arn in _role_sessions:
+            return _role_sessions[role_arn]
+    
+    # Assume the role outside the lock; if two threads race, the first session wins
+    session = _create_role_session(role_arn)
+    with _clients_lock:
+        return _role_sessions.setdefault(role_arn, session)
+
+
+def get_client(service: str, region: str, timeout: Optional[int] = None, role_arn: Optional[str] = None):
+    """
+    Get a cached client for a service and region from the shared session.
+    
+    Args:
+        service: AWS service name (e.g. 'redshift')
+        region: AWS region name
+        timeout: Optional connect/read timeout in seconds
+        role_arn: Optional role whose session the client is created from
+        
+    Returns:
+        boto3 client
+    """
+    session = get_session(role_arn)
+    key = (service, region, timeout, role_arn)
+    with _clients_lock:
+        if key not in _clients:
+            config = None
+            if timeout:
+                config = Config(connect_timeout=timeout, read_timeout=timeout, retries={'max_attempts': 2})
+            _clients[key] = session.client(service, region_name=region, config=config)
+        return _clients[key]
+
+
+def configure_cache(cache_dir: str = DEFAULT_CACHE_DIR, ttl: int = DEFAULT_CACHE_TTL, refresh: bool = False):
+    """
+    Configure the local cluster cache.
+    
+    Args:
+        cache_dir: Directory holding one JSON file per account and region
+        ttl: Seconds a cached result stays valid (0 disables the cache)
+        refresh: If True, ignore cached results but still write fresh ones
+    """
+    _cache_settings.update({'dir': cache_dir, 'ttl': ttl, 'refresh': refresh})
+
+
+def get_account_id(role_arn: Optional[str] = None) -> str:
+    """Get the AWS account ID behind the shared session's credentials (or of an assumed role)."""
+    global _account_id
+    if role_arn:
+        # arn:aws:iam::123456789012:role/RoleName
+        return role_arn.split(':')[4]
+    if _account_id is None:
+        _account_id = get_client('sts', get_session().region_name or 'us-east-1').get_caller_identity()['Account']
+    return _account_id
+
+
+def discover_org_role_arns(role_name: str) -> List[str]:
+    """
+    List active accounts in the AWS Organization and build the role ARN to assume in each.
+    
+    Args:
+        role_name: Name of the role that exists in every member account
+        
+    Returns:
+        List of role ARNs
+    """
+    organizations = get_client('organizations', get_session().region_name or 'us-east-1')
+    role_arns = []
+    for page in organizations.get_paginator('list_accounts').paginate():
+        for account in page['Accounts']:
+            if account.get('Status') == 'ACTIVE':
+                role_arns.append(f"arn:aws:iam::{account['Id']}:role/{role_name}")
+    return role_arns
+
+
+def load_role_arns(args) -> List[str]:
+    """
+    Collect role ARNs from --role-arns, --role-arns-file and --org-role-name.
+    
+    Returns:
+        De-duplicated list of role ARNs (empty for a single-account scan)
+    """
+    role_arns = list(args.role_arns or [])
+    if args.role_arns_file:
+        with open(args.role_arns_file, 'r') as f:
+            role_arns.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    if args.org_role_name:
+        discovered = discover_org_role_arns(args.org_role_name)
+        print(f"Discovered {len(discovered)} active account(s) in the AWS Organization")
+        role_arns.extend(discovered)
+    return list(dict.fromkeys(role_arns))
+
+
+def _cache_path(account_id: str, region: str) -> str:
+    """Path of the cache file for an account and region."""
+    return os.path.join(_cache_settings['dir'], f"{account_id}_{region}.json")
+
+
+def load_cached_clusters(account_id: str, region: str) -> Optional[List[Dict]]:
+    """
+    Load cached clusters for an account and region if they are still fresh.
+    
+    Returns:
+        List of cluster information dictionaries, or None on a cache miss
+    """
+    if not _cache_settings['ttl'] or _cache_settings['refresh']:
+        return None
+    
+    path = _cache_path(account_id, region)
+    try:
+        with open(path, 'r') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    if time.time() - cached.get('fetched_at', 0) > _cache_settings['ttl']:
+        return None
+    return cached['clusters']
+
+
+def save_cached_clusters(account_id: str, region: str, clusters: List[Dict]):
+    """Write clusters for an account and region to the cache (atomically)."""
+    if not _cache_settings['ttl']:
+        return
+    
+    os.makedirs(_cache_settings['dir'], exist_ok=True)
+    path = _cache_path(account_id, region)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'fetched_at': time.time(), 'clusters': clusters}, f, default=str)
+    os.replace(tmp_path, path)
 
 
 def get_all_regions() -> List[str]:
     """Get list of all AWS regions where Redshift is available."""
-    ec2 = boto3.client('ec2')
+    ec2 = get_client('ec2', get_session().region_name or 'us-east-1')
     regions = ec2.describe_regions()
     return [region['RegionName'] for region in regions['Regions']]
 
 
-def get_redshift_clusters(region: str = 'us-east-1', cluster_id: Optional[str] = None) -> List[Dict]:
+def format_cluster(cluster: Dict, region: str, account_id: Optional[str] = None) -> Dict:
+    """Convert a describe_clusters entry into the cluster information dictionary."""
+    return {
+        'cluster_identifier': cluster['ClusterIdentifier'],
+        'account_id': account_id or 'N/A',
+        'node_type': cluster['NodeType'],
+        'number_of_nodes': cluster['NumberOfNodes'],
+        'cluster_status': cluster['ClusterStatus'],
+        'availability_zone': cluster.get('AvailabilityZone', 'N/A'),
+        'region': region,
+        'database_name': cluster.get('DBName', 'N/A'),
+        'master_username': cluster.get('MasterUsername', 'N/A'),
+        'cluster_create_time': cluster.get('ClusterCreateTime', '').isoformat() if cluster.get('ClusterCreateTime') else 'N/A',
+        'encrypted': cluster.get('Encrypted', False),
+        'vpc_id': cluster.get('VpcId', 'N/A'),
+        'publicly_accessible': cluster.get('PubliclyAccessible', False),
+        'endpoint': cluster.get('Endpoint', {}).get('Address', 'N/A') if cluster.get('Endpoint') else 'N/A',
+        'port': cluster.get('Endpoint', {}).get('Port', 'N/A') if cluster.get('Endpoint') else 'N/A',
+        'cluster_version': cluster.get('ClusterVersion', 'N/A'),
+        'allow_version_upgrade': cluster.get('AllowVersionUpgrade', False),
+        'automated_snapshot_retention_period': cluster.get('AutomatedSnapshotRetentionPeriod', 0),
+        'tags': {tag['Key']: tag['Value'] for tag in cluster.get('Tags', [])}
+    }
+
+
+def get_redshift_clusters(region: str = 'us-east-1', cluster_id: Optional[str] = None,
+                          timeout: Optional[int] = None, role_arn: Optional[str] = None) -> List[Dict]:
     """
     Get Redshift cluster information from AWS.
     
+    All pages of describe_clusters are read. Full region listings are cached per
+    account and region (see configure_cache); a specific cluster is served from
+    a fresh cached listing when one exists.
+    
     Args:
         region: AWS region to query
         cluster_id: Optional specific cluster identifier
+        timeout: Optional connect/read timeout in seconds for the region's client
+        role_arn: Optional role to assume (scans that role's account)
         
     Returns:
         List of cluster information dictionaries
     """
     try:
-        redshift = boto3.client('redshift', region_name=region)
+        account_id = get_account_id(role_arn) if (role_arn or _cache_settings['ttl']) else None
+        
+        cached = load_cached_clusters(account_id, region) if account_id else None
+        if cached is not None:
+            if cluster_id:
+                return [c for c in cached if c['cluster_identifier'] == cluster_id]
+            return cached
+        
+        redshift = get_client('redshift', region, timeout, role_arn)
+        paginator = redshift.get_paginator('describe_clusters')
         
         if cluster_id:
-            response = redshift.describe_clusters(ClusterIdentifier=cluster_id)
+            pages = paginator.paginate(ClusterIdentifier=cluster_id)
         else:
-            response = redshift.describe_clusters()
+            pages = paginator.paginate()
         
         clusters = []
-        for cluster in response['Clusters']:
-            cluster_info = {
-                'cluster_identifier': cluster['ClusterIdentifier'],
-                'node_type': cluster['NodeType'],
-                'number_of_nodes': cluster['NumberOfNodes'],
-                'cluster_status': cluster['ClusterStatus'],
-                'availability_zone': cluster.get('AvailabilityZone', 'N/A'),
-                'region': region,
-                'database_name': cluster.get('DBName', 'N/A'),
-                'master_username': cluster.get('MasterUsername', 'N/A'),
-                'cluster_create_time': cluster.get('ClusterCreateTime', '').isoformat() if cluster.get('ClusterCreateTime') else 'N/A',
-                'encrypted': cluster.get('Encrypted', False),
-                'vpc_id': cluster.get('VpcId', 'N/A'),
-                'publicly_accessible': cluster.get('PubliclyAccessible', False),
-                'endpoint': cluster.get('Endpoint', {}).get('Address', 'N/A') if cluster.get('Endpoint') else 'N/A',
-                'port': cluster.get('Endpoint', {}).get('Port', 'N/A') if cluster.get('Endpoint') else 'N/A',
-                'cluster_version': cluster.get('ClusterVersion', 'N/A'),
-                'allow_version_upgrade': cluster.get('AllowVersionUpgrade', False),
-                'automated_snapshot_retention_period': cluster.get('AutomatedSnapshotRetentionPeriod', 0),
-                'tags': {tag['Key']: tag['Value'] for tag in cluster.get('Tags', [])}
-            }
-            clusters.append(cluster_info)
+        for page in pages:
+            for cluster in page['Clusters']:
+                clusters.append(format_cluster(cluster, region, account_id))
+        
+        if account_id and not cluster_id:
+            save_cached_clusters(account_id, region, clusters)
         
         return clusters
     
@@ -103,48 +361,105 @@ def get_redshift_clusters(region: str = 'us-east-1', cluster_id: Optional[str] =
         return []
 
 
-def get_all_clusters_all_regions() -> List[Dict]:
-    """Get Redshift clusters from all AWS regions."""
+def iter_clusters_all_regions(regions: List[str], workers: int = DEFAULT_WORKERS,
+                              region_timeout: int = DEFAULT_REGION_TIMEOUT,
+                              role_arns: Optional[List[str]] = None) -> Iterator[Tuple[str, List[Dict], Optional[str]]]:
+    """
+    Scan regions (in every account when role ARNs are given) on a bounded pool,
+    yielding each account/region's clusters as soon as it finishes.
+    
+    Args:
+        regions: AWS regions to scan
+        workers: Number of account/region pairs to query concurrently
+        region_timeout: Connect/read timeout in seconds for each region
+        role_arns: Optional roles to assume, one per account (None = default credentials)
+        
+    Yields:
+        Tuples of (label, clusters, error message or None); the label is the
+        region, prefixed with the account ID for multi-account scans
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for role_arn, region in product(role_arns or [None], regions):
+            label = f"{get_account_id(role_arn)}/{region}" if role_arn else region
+            futures[executor.submit(get_redshift_clusters, region, None, region_timeout, role_arn)] = label
+        for future in as_completed(futures):
+            label = futures[future]
+            try:
+                yield label, future.result(), None
+            except Exception as e:
+                yield label, [], str(e)
+
+
+def _scan_description(regions: List[str], role_arns: Optional[List[str]], workers: int) -> str:
+    """Describe the scan about to run."""
+    if role_arns:
+        return (f"Scanning {len(regions)} region(s) in {len(role_arns)} account(s) "
+                f"for Redshift clusters ({workers} workers)...")
+    return f"Scanning {len(regions)} regions for Redshift clusters ({workers} workers)..."
+
+
+def get_all_clusters_all_regions(workers: int = DEFAULT_WORKERS,
+                                 region_timeout: int = DEFAULT_REGION_TIMEOUT,
+                                 role_arns: Optional[List[str]] = None,
+                                 regions: Optional[List[str]] = None) -> List[Dict]:
+    """Get Redshift clusters from all AWS regions (or the given regions), optionally across accounts."""
     all_clusters = []
-    regions = get_all_regions()
+    regions = regions or get_all_regions()
     
-    print(f"Scanning {len(regions)} regions for Redshift clusters...")
+    print(_scan_description(regions, role_arns, workers))
     
-    for region in regions:
-        print(f"  Checking {region}...", end=' ')
-        clusters = get_redshift_clusters(region)
-        if clusters:
-            print(f"Found {len(clusters)} cluster(s)")
+    for label, clusters, error in iter_clusters_all_regions(regions, workers, region_timeout, role_arns):
+        if error:
+            print(f"  {label}: Error - {error}")
+        elif clusters:
+            print(f"  {label}: Found {len(clusters)} cluster(s)")
             all_clusters.extend(clusters)
         else:
-            print("No clusters")
+            print(f"  {label}: No clusters")
     
     return all_clusters
 
 
-def print_cluster_table(clusters: List[Dict]):
+TABLE_WIDTH = 120
+
+
+def print_table_header(show_account: bool = False):
+    """Print the cluster table header."""
+    account = f"{'Account':<14} " if show_account else ''
+    print("\n" + "="*TABLE_WIDTH)
+    print(f"{account}{'Cluster ID':<30} {'Region':<15} {'Node Type':<15} {'Nodes':<6} {'Status':<12} {'Created':<20}")
+    print("="*TABLE_WIDTH)
+
+
+def print_table_row(cluster: Dict, show_account: bool = False):
+    """Print one cluster as a table row."""
+    account = f"{cluster.get('account_id', 'N/A'):<14} " if show_account else ''
+    print(f"{account}{cluster['cluster_identifier']:<30} "
+          f"{cluster['region']:<15} "
+          f"{cluster['node_type']:<15} "
+          f"{cluster['number_of_nodes']:<6} "
+          f"{cluster['cluster_status']:<12} "
+          f"{cluster['cluster_create_time']:<20}")
+
+
+def print_table_footer(clusters: List[Dict]):
+    """Print the cluster table footer with totals."""
+    print("="*TABLE_WIDTH)
+    print(f"\nTotal clusters: {len(clusters)}")
+    print(f"Total nodes: {sum(c['number_of_nodes'] for c in clusters)}")
+
+
+def print_cluster_table(clusters: List[Dict], show_account: bool = False):
     """Print clusters in a formatted table."""
     if not clusters:
         print("No Redshift clusters found.")
         return
     
-    # Print header
-    print("\n" + "="*120)
-    print(f"{'Cluster ID':<30} {'Region':<15} {'Node Type':<15} {'Nodes':<6} {'Status':<12} {'Created':<20}")
-    print("="*120)
-    
-    # Print each cluster
+    print_table_header(show_account)
     for cluster in clusters:
-        print(f"{cluster['cluster_identifier']:<30} "
-              f"{cluster['region']:<15} "
-              f"{cluster['node_type']:<15} "
-              f"{cluster['number_of_nodes']:<6} "
-              f"{cluster['cluster_status']:<12} "
-              f"{cluster['cluster_create_time']:<20}")
-    
-    print("="*120)
-    print(f"\nTotal clusters: {len(clusters)}")
-    print(f"Total nodes: {sum(c['number_of_nodes'] for c in clusters)}")
+        print_table_row(cluster, show_account)
+    print_table_footer(clusters)
 
 
 def print_cluster_details(cluster: Dict):
@@ -165,14 +480,46 @@ def print_cluster_details(cluster: Dict):
     print("="*80)
 
 
-def export_to_json(clusters: List[Dict], filename: str):
-    """Export cluster data to JSON file."""
+class ClusterJsonWriter:
+    """
+    Write cluster data to a JSON file incrementally, so results can be saved
+    as regions finish instead of after the whole scan.
+    """
+    
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.total_clusters = 0
+        self.total_nodes = 0
+        self._file = open(filename, 'w')
+        self._file.write('{\n  "export_date": %s,\n  "clusters": [' % json.dumps(datetime.now().isoformat()))
+    
+    def write(self, clusters: List[Dict]):
+        """Append clusters to the export."""
+        for cluster in clusters:
+            self._file.write(',\n' if self.total_clusters else '\n')
+            self._file.write('    ' + json.dumps(cluster, default=str))
+            self.total_clusters += 1
+            self.total_nodes += cluster['number_of_nodes']
+        self._file.flush()
+    
+    def close(self):
+        """Write the totals and close the file."""
+        self._file.write('\n  ],\n  "total_clusters": %d,\n  "total_nodes": %d\n}\n'
+                         % (self.total_clusters, self.total_nodes))
+        self._file.close()
+        print(f"\nData exported to: {self.filename}")
+
+
+def export_to_json(clusters: List[Dict], filename: str, extra: Optional[Dict] = None):
+    """Export cluster data (and optional extra top-level fields) to JSON file."""
     output = {
         'export_date': datetime.now().isoformat(),
         'total_clusters': len(clusters),
         'total_nodes': sum(c['number_of_nodes'] for c in clusters),
         'clusters': clusters
     }
+    if extra:
+        output.update(extra)
     
     with open(filename, 'w') as f:
         json.dump(output, f, indent=2, default=str)
@@ -180,6 +527,248 @@ def export_to_json(clusters: List[Dict], filename: str):
     print(f"\nData exported to: {filename}")
 
 
+def get_redshift_costs(api_key: str, start_date: str, end_date: str,
+                       base_url: str = DEFAULT_CLOUDABILITY_URL) -> List[Dict]:
+    """
+    Get Redshift cost rows per resource from the Cloudability reporting API.
+    
+    Rows are requested in large pages until the API returns a short page.
+    
+    Args:
+        api_key: Cloudability API key
+        start_date: First day of the period (YYYY-MM-DD)
+        end_date: Last day of the period (YYYY-MM-DD)
+        base_url: Cloudability API base URL
+        
+    Returns:
+        List of dictionaries with resource_identifier, vendor_account_identifier,
+        region, unblended_cost and usage_hours
+    """
+    url = f"{base_url.rstrip('/')}/v3/reporting/cost/run"
+    params = {
+        'start_date': start_date,
+        'end_date': end_date,
+        'dimensions': 'resource_identifier,vendor_account_identifier,region',
+        'metrics': 'unblended_cost,usage_hours',
+        'filters': f'enhanced_service_name=={REDSHIFT_SERVICE_NAME}',
+        'limit': COST_PAGE_SIZE,
+        'offset': 0
+    }
+    
+    rows = []
+    with requests.Session() as session:
+        session.auth = (api_key, '')
+        while True:
+            response = session.get(url, params=params, timeout=120)
+            response.raise_for_status()
+            page = response.json().get('results', [])
+            rows.extend(page)
+            if len(page) < COST_PAGE_SIZE:
+                break
+            params['offset'] += COST_PAGE_SIZE
+    
+    return rows
+
+
+def normalise_cluster_identifier(resource_id: str) -> str:
+    """
+    Reduce a Redshift resource identifier (cluster name or ARN such as
+    arn:aws:redshift:us-east-1:123456789012:cluster:my-cluster) to the lower-case cluster name.
+    """
+    resource_id = str(resource_id or '').strip()
+    if resource_id.startswith('arn:'):
+        resource_id = resource_id.split(':')[-1]
+    return resource_id.split('/')[-1].lower()
+
+
+def _to_float(value) -> float:
+    """Convert a reporting API metric value to float (values may be strings)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def join_clusters_with_costs(clusters: List[Dict], cost_rows: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Join cluster inventory with Cloudability cost rows on cluster identifier.
+    
+    Rows are matched on account and cluster name, or on the name alone when that
+    is unambiguous. Cost rows for the same cluster are summed. Each cluster gains total_cost,
+    usage_hours, cost_per_node and cost_per_node_hour.
+    
+    Args:
+        clusters: Cluster information dictionaries
+        cost_rows: Rows from get_redshift_costs
+        
+    Returns:
+        Tuple of (clusters with cost fields, cost rows that matched no cluster)
+    """
+    costs_by_cluster = {}
+    for row in cost_rows:
+        # Cluster names are only unique within an account, so key on both
+        account = ''.join(ch for ch in str(row.get('vendor_account_identifier') or '') if ch.isdigit())
+        key = (account, normalise_cluster_identifier(row.get('resource_identifier')))
+        totals = costs_by_cluster.setdefault(key, {'cost': 0.0, 'hours': 0.0, 'rows': []})
+        totals['cost'] += _to_float(row.get('unblended_cost'))
+        totals['hours'] += _to_float(row.get('usage_hours'))
+        totals['rows'].append(row)
+    
+    # Fall back to the cluster name alone when a cluster's account is unknown or absent from the cost rows
+    by_name = {}
+    for key, totals in costs_by_cluster.items():
+        by_name.setdefault(key[1], []).append(key)
+    
+    joined = []
+    matched = set()
+    for cluster in clusters:
+        name = cluster['cluster_identifier'].lower()
+        key = (str(cluster.get('account_id', '')), name)
+        if key not in costs_by_cluster:
+            candidates = [k for k in by_name.get(name, []) if k not in matched]
+            key = candidates[0] if len(candidates) == 1 else None
+        totals = costs_by_cluster.get(key) if key else None
+        nodes = cluster['number_of_nodes'] or 0
+        cost = round(totals['cost'], 2) if totals else 0.0
+        hours = round(totals['hours'], 2) if totals else 0.0
+        if totals:
+            matched.add(key)
+        joined.append(dict(
+            cluster,
+            total_cost=cost,
+            usage_hours=hours,
+            cost_per_node=round(cost / nodes, 2) if nodes else None,
+            cost_per_node_hour=round(cost / hours, 4) if hours else None,
+            cost_matched=bool(totals)
+        ))
+    
+    unmatched = [row for key, totals in costs_by_cluster.items() if key not in matched for row in totals['rows']]
+    return joined, unmatched
+
+
+def print_cost_table(clusters: List[Dict], unmatched: List[Dict]):
+    """Print clusters with their joined cost metrics."""
+    if not clusters:
+        print("No Redshift clusters found.")
+        return
+    
+    print("\n" + "="*TABLE_WIDTH)
+    print(f"{'Cluster ID':<30} {'Region':<15} {'Node Type':<15} {'Nodes':<6} {'Total Cost':>12} {'Cost/Node':>12} {'Cost/Node-Hr':>13}")
+    print("="*TABLE_WIDTH)
+    
+    for cluster in clusters:
+        per_node = f"{cluster['cost_per_node']:,.2f}" if cluster['cost_per_node'] is not None else 'N/A'
+        per_hour = f"{cluster['cost_per_node_hour']:,.4f}" if cluster['cost_per_node_hour'] is not None else 'N/A'
+        print(f"{cluster['cluster_identifier']:<30} "
+              f"{cluster['region']:<15} "
+              f"{cluster['node_type']:<15} "
+              f"{cluster['number_of_nodes']:<6} "
+              f"{cluster['total_cost']:>12,.2f} "
+              f"{per_node:>12} "
+              f"{per_hour:>13}")
+    
+    print("="*TABLE_WIDTH)
+    print(f"\nTotal clusters: {len(clusters)} ({sum(1 for c in clusters if c['cost_matched'])} with cost data)")
+    print(f"Total nodes: {sum(c['number_of_nodes'] for c in clusters)}")
+    print(f"Total cost: {sum(c['total_cost'] for c in clusters):,.2f}")
+    if unmatched:
+        print(f"Cost rows not matched to a scanned cluster: {len(unmatched)} "
+              f"({sum(_to_float(r.get('unblended_cost')) for r in unmatched):,.2f})")
+
+
+def run_cost_join(args, role_arns: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Fetch cluster inventory and Cloudability costs concurrently, then join them.
+    
+    Args:
+        args: Parsed command-line arguments
+        role_arns: Optional roles to assume for a multi-account inventory
+        
+    Returns:
+        List of clusters with cost fields
+    """
+    api_key = args.cldy_api_key or os.environ.get('CLOUDABILITY_API_KEY')
+    if not api_key:
+        raise ValueError("Cloudability API key required for --with-costs "
+                         "(use --cldy-api-key or set CLOUDABILITY_API_KEY)")
+    
+    start_date = args.start_date or date.today().replace(day=1).isoformat()
+    end_date = args.end_date or date.today().isoformat()
+    print(f"Fetching Redshift costs from Cloudability ({start_date} to {end_date})...")
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        costs_future = executor.submit(get_redshift_costs, api_key, start_date, end_date, args.cldy_url)
+        
+        if args.all_regions or role_arns:
+            regions = None if args.all_regions else [args.region]
+            clusters = get_all_clusters_all_regions(args.workers, args.region_timeout, role_arns, regions)
+        else:
+            clusters = get_redshift_clusters(args.region, args.cluster)
+        
+        cost_rows = costs_future.result()
+    
+    print(f"Got {len(cost_rows)} Redshift cost row(s) from Cloudability")
+    joined, unmatched = join_clusters_with_costs(clusters, cost_rows)
+    print_cost_table(joined, unmatched)
+    
+    if args.output:
+        export_to_json(joined, args.output, {
+            'cost_period': {'start_date': start_date, 'end_date': end_date},
+            'total_cost': round(sum(c['total_cost'] for c in joined), 2),
+            'unmatched_cost_rows': unmatched
+        })
+    
+    return joined
+
+
+def scan_all_regions_streaming(workers: int, region_timeout: int, output: Optional[str],
+                               role_arns: Optional[List[str]] = None,
+                               regions: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Scan all regions in parallel, printing table rows and writing JSON as each region finishes.
+    
+    Args:
+        workers: Number of account/region pairs to query concurrently
+        region_timeout: Connect/read timeout in seconds for each region
+        output: Optional JSON file to export to
+        role_arns: Optional roles to assume, one per account
+        regions: Regions to scan (default: all regions)
+        
+    Returns:
+        List of all clusters found
+    """
+    all_clusters = []
+    failed = []
+    regions = regions or get_all_regions()
+    show_account = bool(role_arns)
+    
+    print(_scan_description(regions, role_arns, workers))
+    
+    writer = ClusterJsonWriter(output) if output else None
+    try:
+        print_table_header(show_account)
+        for label, clusters, error in iter_clusters_all_regions(regions, workers, region_timeout, role_arns):
+            if error:
+                failed.append((label, error))
+                continue
+            for cluster in clusters:
+                print_table_row(cluster, show_account)
+            if writer:
+                writer.write(clusters)
+            all_clusters.extend(clusters)
+        print_table_footer(all_clusters)
+    finally:
+        if writer:
+            writer.close()
+    
+    if failed:
+        print(f"\n⚠ {len(failed)} region(s) could not be scanned:")
+        for label, error in sorted(failed):
+            print(f"  {label}: {error}")
+    
+    return all_clusters
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Get Redshift cluster node information from AWS',
@@ -200,6 +789,21 @@ Examples:
   
   # Scan all regions
   python get_redshift_nodes.py --all-regions --output all_clusters.json
+  
+  # Scan all regions with more parallelism and a shorter per-region timeout
+  python get_redshift_nodes.py --all-regions --workers 20 --region-timeout 15
+  
+  # Bypass the local cache (results are cached for an hour by default)
+  python get_redshift_nodes.py --all-regions --refresh
+  
+  # Every account in the AWS Organization (role must exist in each member account)
+  python get_redshift_nodes.py --all-regions --org-role-name OrganizationAccountAccessRole --workers 32
+  
+  # Specific accounts through assumed roles
+  python get_redshift_nodes.py --all-regions --role-arns-file roles.txt
+  
+  # Per-node costs from Cloudability for April (API key from CLOUDABILITY_API_KEY)
+  python get_redshift_nodes.py --all-regions --with-costs --start-date 2026-04-01 --end-date 2026-04-30 --output costs.json
 
 Note: Requires AWS credentials configured (via AWS CLI, environment variables, or IAM role)
         """
@@ -222,11 +826,88 @@ Note: Requires AWS credentials configured (via AWS CLI, environment variables, o
         help='Scan all AWS regions for Redshift clusters'
     )
     
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Number of regions to scan in parallel with --all-regions (default: {DEFAULT_WORKERS})'
+    )
+    
+    parser.add_argument(
+        '--region-timeout',
+        type=int,
+        default=DEFAULT_REGION_TIMEOUT,
+        help=f'Connect/read timeout in seconds for each region (default: {DEFAULT_REGION_TIMEOUT})'
+    )
+    
     parser.add_argument(
         '--output',
         help='Export results to JSON file'
     )
     
+    parser.add_argument(
+        '--role-arns',
+        nargs='+',
+        metavar='ARN',
+        help='Scan the accounts behind these IAM roles (assumed with the default credentials)'
+    )
+    
+    parser.add_argument(
+        '--role-arns-file',
+        help='File with one IAM role ARN per line to scan'
+    )
+    
+    parser.add_argument(
+        '--org-role-name',
+        help='Discover active AWS Organization accounts and assume this role name in each'
+    )
+    
+    parser.add_argument(
+        '--with-costs',
+        action='store_true',
+        help='Join clusters with Redshift cost rows from the Cloudability reporting API'
+    )
+    
+    parser.add_argument(
+        '--cldy-api-key',
+        help='Cloudability API key for --with-costs (default: CLOUDABILITY_API_KEY environment variable)'
+    )
+    
+    parser.add_argument(
+        '--cldy-url',
+        default=DEFAULT_CLOUDABILITY_URL,
+        help=f'Cloudability API base URL (default: {DEFAULT_CLOUDABILITY_URL})'
+    )
+    
+    parser.add_argument(
+        '--start-date',
+        help='Cost period start date YYYY-MM-DD (default: first day of this month)'
+    )
+    
+    parser.add_argument(
+        '--end-date',
+        help='Cost period end date YYYY-MM-DD (default: today)'
+    )
+    
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Ignore cached results and query AWS again (fresh results are still cached)'
+    )
+    
+    parser.add_argument(
+        '--cache-ttl',
+        type=int,
+        default=DEFAULT_CACHE_TTL,
+        help=f'Seconds cached cluster listings stay valid (default: {DEFAULT_CACHE_TTL}, 0 = no cache)'
+    )
+    
+    parser.add_argument(
+        '--cache-dir',
+        default=DEFAULT_CACHE_DIR,
+        help=f'Directory for cached cluster listings (default: {DEFAULT_CACHE_DIR})'
+    )
+    
     parser.add_argument(
         '--detailed',
         action='store_true',
@@ -235,10 +916,24 @@ Note: Requires AWS credentials configured (via AWS CLI, environment variables, o
     
     args = parser.parse_args()
     
+    configure_cache(args.cache_dir, args.cache_ttl, args.refresh)
+    
     try:
+        role_arns = load_role_arns(args)
+        regions = None if args.all_regions else [args.region]
+        
+        if args.with_costs:
+            run_cost_join(args, role_arns)
+            return 0
+        
+        # Stream the all-regions / multi-account table and JSON export as regions finish
+        if (args.all_regions or role_arns) and not args.detailed:
+            scan_all_regions_streaming(args.workers, args.region_timeout, args.output, role_arns, regions)
+            return 0
+        
         # Get cluster data
-        if args.all_regions:
-            clusters = get_all_clusters_all_regions()
+        if args.all_regions or role_arns:
+            clusters = get_all_clusters_all_regions(args.workers, args.region_timeout, role_arns, regions)
         else:
             clusters = get_redshift_clusters(args.region, args.cluster)
         
@@ -268,6 +963,7 @@ Note: Requires AWS credentials configured (via AWS CLI, environment variables, o
         print("   Run: pip install -r requirements.txt")
         print("\n3. Insufficient IAM Permissions")
         print("   Required: redshift:DescribeClusters")
+        print("   Multi-account: sts:AssumeRole (and organizations:ListAccounts for --org-role-name)")
         print("   Contact your AWS administrator")
         print("\n4. Verify Your Setup")
         print("   Test credentials: aws sts get-caller-identity")
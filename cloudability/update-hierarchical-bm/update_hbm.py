@@ -79,14 +79,20 @@ import os
 import csv
 import sys
 import json
+import hashlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from apptio_lib import cloudability as cldy
 
+HBM_WORKERS = 4
+
 def main():
 
     ####
     # This script is for updating Hierarchical Business Mappings (HBM) in Cloudability.
     # It reads CSV files in the current directory, where each file corresponds to one HBM
     # The name of the file should exactly match the name of the HBM in Cloudability.
+    # Files are processed in parallel and an HBM is only posted when its values changed.
     # The format of the CSV should match the template from Cloudability.
     ####
 
@@ -119,6 +125,7 @@ def main():
             current_bms[bm['name']] = bm
 
     current_hbms = {}
+    org_id = None
     hbm_ep = '/internal/hierarchical-business-mappings'
     current_result = cldy.get(hbm_ep, api_key=api_key, region=region)
     if isinstance(current_result, dict):
@@ -131,91 +138,207 @@ def main():
         for hbm in current_result:
             current_hbms[hbm['name']] = hbm
 
-    statements = {
-        'columns': [],
-        'values': []
+    files = sorted(file for file in os.listdir('.') if file.endswith('.csv'))
+    if not files:
+        print('No csv files found in current directory. Quitting')
+        return
+    if name and len(files) > 1:
+        print(f'-name only applies to a single CSV. Found {len(files)}, using the file names instead.')
+        name = ''
+
+    with ThreadPoolExecutor(max_workers=HBM_WORKERS) as executor:
+        results = list(executor.map(
+            lambda file: process_hbm_file(file, name or os.path.splitext(file)[0], api_key, region,
+                                          org_id, current_bms, current_hbms),
+            files))
+
+    print('')
+    for status in ('created', 'updated', 'unchanged', 'skipped', 'failed'):
+        print(f'{status.capitalize()}: {results.count(status)}')
+
+
+def process_hbm_file(file, name, api_key, region, org_id, current_bms, current_hbms):
+    # Builds the HBM for one CSV and posts it if it differs from what's in Cloudability.
+    # Returns created/updated/unchanged/skipped/failed
+    current_hbm_index = None
+    print(f'Using CSV file: {file} for HBM: {name}')
+    table = HbmTable.from_csv(file)
+    headers = table.columns
+
+    if not len(table):
+        print(f'No values found in {file}. Skipping this file.')
+        return 'skipped'
+
+    duplicates, conflicts = table.validate()
+    if duplicates:
+        print(f'WARNING: {duplicates} duplicate rows in {file}. Only the first is used.')
+    if conflicts:
+        print(f'ERROR: {len(conflicts)} hierarchy conflicts in {file}. Skipping this file.')
+        for conflict in conflicts[:20]:
+            print(f'\t{conflict}')
+        return 'failed'
+
+    if name not in current_hbms:
+        print(f'{name} not found in current hierarchical business mappings. Creating new HBM.')
+    else:
+        current_hbm_index = current_hbms[name]['index']
+
+    # Columns go backwards from the end, skipping the first column.
+    baseBusinessMapping = headers[0]
+    if baseBusinessMapping not in current_bms:
+        print(f'ERROR: {baseBusinessMapping} not found in current business mappings. Skipping {file}.')
+        return 'failed'
+    baseMappingIndex = current_bms[baseBusinessMapping]['index']
+
+    sub_mappings = []
+    for column in headers[-1:0:-1]:
+        sub_mapping = {
+            "name": column,
+            # To change default values, modify the following line
+            "defaultValue": ""
+        }
+        sub_mappings.append(sub_mapping)
+
+    new_mapping = {
+        "orgId": org_id,
+        "name": name,
+        "baseBusinessMapping": {
+            "index": baseMappingIndex
+        },
+        "hierarchicalBusinessMappings": sub_mappings
     }
+    if current_hbm_index is not None:
+        new_mapping['index'] = current_hbm_index
+        # compared straight from the table, row dicts are only built when we post
+        if hbm_hash(new_mapping, headers, table.sorted_rows()) == hbm_hash(current_hbms[name]):
+            print(f'{name} matches. Skipping')
+            return 'unchanged'
+    new_mapping['statementValues'] = table.statement_values()
 
-    for file in os.listdir('.'):
-        # We'll use the first CSV in the current directory to make the mappings.
-        # We could set it up so that each CSV is for one HBM
-        # but we'll just do one for now.
-        file_mappings = {}
-        if not file.endswith('.csv'):
-            continue 
-        
-        current_hbm_index = None
-        baseBusinessMapping = None
-        baseMappingIndex = None
-        print(f'Using CSV file: {file}')
-        with open(file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            rows = list(reader)
-        
-        if not name:
-            print(f'No -name argument found. Using name from file for HBM: {file}')
-            name = os.path.splitext(file)[0]
-
-        if name not in current_hbms:
-            print(f'{name} not found in current hierarchical business mappings. Creating new HBM.')
-        else:
-            current_hbm_index = current_hbms[name]['index']
-
-        headers = list(rows[0].keys())
-        # Columns go backwards from the end, skipping the first column.
-        statements['columns'] = headers
-        baseBusinessMapping = headers[0]
-        if baseBusinessMapping not in current_bms:
-            print(f'ERROR: {baseBusinessMapping} not found in current business mappings. Quitting.')
-            exit(1)
-        baseMappingIndex = current_bms[baseBusinessMapping]['index']
-        statements['values'] = make_hbm_values(rows)
-
-        if not statements['values']:
-            print(f'No values found in {file}. Skipping this file.')
-            continue
-
-        sub_mappings = []
-        for column in headers[-1:0:-1]:
-            sub_mapping = {
-                "name": column,
-                # To change default values, modify the following line
-                "defaultValue": ""
-            }
-            sub_mappings.append(sub_mapping)
+    print(f'Creating or updating HBM: {name}')
+    response = cldy.post('/internal/hierarchical-business-mappings', api_key=api_key, data=new_mapping, region=region)
+    if isinstance(response, dict) and 'result' in response:
+        print(f'Successfully created or updated HBM: {name}')
+        return 'updated' if current_hbm_index is not None else 'created'
+    print(f'Failed to create or update HBM: {name}')
+    print(response)
+    return 'failed'
 
-        new_mapping = {
-            "orgId": org_id,
-            "name": name,
-            "baseBusinessMapping": {
-                "index": baseMappingIndex
-            },
-            "hierarchicalBusinessMappings": sub_mappings,
-            "statementValues": statements
+
+def hbm_hash(mapping, columns=None, rows=None):
+    # Hash of what the HBM does, ignoring row order. If the current HBM came back
+    # without its values the hash can't match and the HBM is posted.
+    # columns/rows can be passed in sorted already instead of reading statementValues.
+    if rows is None:
+        statement_values = mapping.get('statementValues') or {}
+        columns = statement_values.get('columns') or []
+        rows = sorted(
+            [str(row.get(column) or '') for column in columns]
+            for row in statement_values.get('values') or []
+        )
+    canonical = {
+        'base': (mapping.get('baseBusinessMapping') or {}).get('index'),
+        'levels': [(sub.get('name'), sub.get('defaultValue') or '')
+                   for sub in mapping.get('hierarchicalBusinessMappings') or []],
+        'columns': columns,
+        'rows': rows
+    }
+    return hashlib.sha256(json.dumps(canonical).encode('utf-8')).hexdigest()
+
+
+class HbmTable:
+    """
+    Column-oriented store for HBM rows.
+
+    Each column keeps a table of distinct strings and an array of integer codes
+    into it, so repeated level values (the usual case in a hierarchy) are stored
+    once. Rows are read straight from the CSV without building a dict per row.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.strings = [[] for _ in self.columns]  # code -> value, per column
+        self.codes = [{} for _ in self.columns]  # value -> code, per column
+        self.data = [array('I') for _ in self.columns]
+
+    @classmethod
+    def from_csv(cls, csv_file):
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            table = cls(next(reader, []))
+            for row in reader:
+                if any(row):
+                    table.add_row(row)
+        return table
+
+    def add_row(self, row):
+        for i, column_data in enumerate(self.data):
+            value = row[i] if i < len(row) and row[i] else ''
+            code = self.codes[i].get(value)
+            if code is None:
+                code = len(self.strings[i])
+                self.codes[i][value] = code
+                self.strings[i].append(value)
+            column_data.append(code)
+
+    def __len__(self):
+        return len(self.data[0]) if self.data else 0
+
+    def row_codes(self, index):
+        return tuple(column_data[index] for column_data in self.data)
+
+    def row_values(self, index):
+        return [self.strings[i][column_data[index]] for i, column_data in enumerate(self.data)]
+
+    def validate(self):
+        # Returns (duplicate row count, conflict messages). A base value may only appear
+        # once, and every level value may only roll up to one value in the next level.
+        duplicates = 0
+        conflicts = []
+        seen_rows = {}
+        keep = []
+        for index in range(len(self)):
+            codes = self.row_codes(index)
+            if codes[0] in seen_rows:
+                if seen_rows[codes[0]] == codes:
+                    duplicates += 1
+                    continue
+                conflicts.append(f'{self.columns[0]} "{self.strings[0][codes[0]]}" is listed with different levels')
+                continue
+            seen_rows[codes[0]] = codes
+            keep.append(index)
+
+        for level in range(1, len(self.columns) - 1):
+            parents = {}
+            reported = set()
+            for index in keep:
+                child = self.data[level][index]
+                parent = self.data[level + 1][index]
+                if not self.strings[level][child]:
+                    continue
+                first_parent = parents.setdefault(child, parent)
+                if first_parent != parent and (child, parent) not in reported:
+                    # compared against the first parent, each extra parent reported once
+                    reported.add((child, parent))
+                    conflicts.append(
+                        f'{self.columns[level]} "{self.strings[level][child]}" rolls up to both '
+                        f'"{self.strings[level + 1][first_parent]}" and "{self.strings[level + 1][parent]}" '
+                        f'in {self.columns[level + 1]}')
+
+        if duplicates:
+            for column_data in self.data:
+                column_data[:] = array('I', (column_data[index] for index in keep))
+        return duplicates, conflicts
+
+    def sorted_rows(self):
+        return sorted(self.row_values(index) for index in range(len(self)))
+
+    def statement_values(self):
+        # the payload the API wants. The row dicts share the interned strings
+        return {
+            'columns': self.columns,
+            'values': [dict(zip(self.columns, self.row_values(index))) for index in range(len(self))]
         }
-        if current_hbm_index >= 0:
-            new_mapping['index'] = current_hbm_index
-        print(f'Creating or updating HBM: {name}')
-        response = cldy.post('/internal/hierarchical-business-mappings', api_key=api_key, data=new_mapping)
-        if isinstance(response, dict) and 'result' in response:
-            print(f'Successfully created or updated HBM: {name}')
-        else:
-            print(f'Failed to create or update HBM: {name}')
-            print(response)
-
-
-def make_hbm_values(rows):
-    # This function will take the rows from the CSV and return a list of dictionaries
-    # where each dictionary is a row with the business mapping values.
-    values = []
-    for row in rows:
-        value_row = {}
-        for key, value in row.items():
-            if not value:
-                value = ''
-            value_row[key] = value
-        values.append(value_row)
-    return values
 
 
 if __name__ == '__main__':
@@ -7,9 +7,10 @@ SPDX-License-Identifier: Apache-2.0
 import os
 import csv
 import sys
-import json
 import requests
+import threading
 from time import time, sleep
+from concurrent.futures import ThreadPoolExecutor
 from charset_normalizer import from_path
 from apptio_lib import cloudability as cldy
 
@@ -17,7 +18,12 @@ from apptio_lib import cloudability as cldy
 Used for mass creation and updating of views in Cloudability.
 
 General usage
-python view_updater.py <api_key> [-region <region>]
+python view_updater.py <api_key> [-region <region>] [-plan] [-sorted]
+
+-plan prints how many views would be created, updated or left alone without changing anything.
+-sorted says all rows for a view are next to each other (CSV sorted by view name), so each
+view is uploaded as soon as its last row is read instead of after every file is read.
+Views are created and updated in parallel, spaced out to stay under the API rate limit.
 
 This script reads CSV files in the current directory
 where each CSV file contains view definitions.
@@ -59,11 +65,25 @@ A reminder of valid Cloudability view comparators:
 - != : Not Equals
 - =@ : Contains
 - !=@ : Does Not Contain
+Spelled out names (equals, contains, ...) and = / <> are converted to these.
+Header rows starting with "View Name" are skipped and repeated filters are only added once.
 
 
 
 """
 
+UPSERT_WORKERS = 4
+UPSERT_DELAY = 0.25  # min secs between requests across all workers
+
+COMPARATORS = {
+    '==': '==', '=': '==', 'equals': '==', 'is': '==',
+    '!=': '!=', '<>': '!=', 'not equals': '!=', 'is not': '!=',
+    '=@': '=@', 'contains': '=@',
+    '!=@': '!=@', 'not contains': '!=@', 'does not contain': '!=@',
+}
+# a third column containing any of these was meant as a comparator, not a filter value
+OPERATOR_CHARS = set('=!<>@')
+
 def main():
 
     if len(sys.argv) < 2:
@@ -73,6 +93,8 @@ def main():
     api_key = sys.argv[1]
 
     region = ''
+    plan_only = '-plan' in sys.argv
+    sorted_input = '-sorted' in sys.argv
     if len(sys.argv) > 2:
         for arg in sys.argv[2:]:
             if 'region' in arg:
@@ -95,68 +117,168 @@ def main():
         current_views[view['title']] = view
 
     # time for the csvs!
-    csv_files = [f for f in os.listdir('.') if f.endswith('.csv')]
-    new_views = {}
+    csv_files = sorted(f for f in os.listdir('.') if f.endswith('.csv'))
+    new_views = iter_views(csv_files, sorted_input)
+
+
+    counts = sync_views(new_views, current_views, api_key, region, plan_only)
+    print('')
+    if plan_only:
+        print('Plan only. No changes made.')
+    for action in ('create', 'update', 'noop', 'failed'):
+        print(f'{action}: {counts.get(action, 0)}')
+
+
+def is_header_row(row):
+    return bool(row) and row[0].strip().lower() == 'view name'
+
+
+def normalise_comparator(comparator):
+    return COMPARATORS.get(comparator.strip().lower())
+
+
+def iter_view_rows(csv_files):
+    # yields (view name, filters) for each CSV line, skipping headers and blank lines
     for csv_file in csv_files:
-        with open(csv_file, 'r', encoding='utf-8') as file:
+        with open(csv_file, 'r', encoding='utf-8-sig', newline='') as file:
             reader = csv.reader(file)
             for row in reader:
-                if row[0] == ['View Name']:
+                if not row or not row[0].strip() or is_header_row(row):
+                    continue
+                if len(row) < 3:
+                    print(f"Skipping short row in {csv_file} line {reader.line_num}: {row}")
                     continue
-                view_name = row[0]
-                filter_dim = row[1]
-                comparator = row[2]
+                view_name = row[0].strip()
+                filter_dim = row[1].strip()
+                comparator = normalise_comparator(row[2])
                 filter_values = row[3:]
+                if not comparator:
+                    if OPERATOR_CHARS & set(row[2]):
+                        print(f"Unknown comparator '{row[2]}' in {csv_file} line {reader.line_num}. Skipping row")
+                        continue
+                    # no comparator column on this line, so the third column is already a value
+                    print(f"No comparator in {csv_file} line {reader.line_num}. Using ==")
+                    comparator = '=='
+                    filter_values = row[2:]
                 filters = []
                 for value in filter_values:
-                    if value:
+                    if value.strip():
                         filters.append({
                             "field": filter_dim,
                             "comparator": comparator,
-                            "value": value
+                            "value": value.strip()
                         })
-
-
-                if view_name in new_views:
-                    new_views[view_name].extend(filters)
-                else:
-                    new_views[view_name] = filters
-
-
-    for new_name, filters in new_views.items():
-        id = None
-        shared_with_users = []
-        shared_with_org = False
-        if new_name in current_views:        
-            if filters == current_views[new_name]['filters']:
-                print(f"View '{new_name}' already exists with the same filters. Skipping update.")
+                yield view_name, filters
+
+
+def iter_views(csv_files, sorted_input=False):
+    # Groups CSV lines into (view name, filters) with duplicate filters removed.
+    # With sorted_input a view is yielded as soon as the next view starts,
+    # otherwise every file is read first.
+    views = {}
+    finished = set()
+    for view_name, filters in iter_view_rows(csv_files):
+        if sorted_input and view_name not in views:
+            if view_name in finished:
+                print(f"View '{view_name}' appears again after it was uploaded. Rerun without -sorted. Skipping row")
+                continue
+            for done_name in list(views):
+                finished.add(done_name)
+                yield done_name, views.pop(done_name)
+        view_filters = views.setdefault(view_name, [])
+        keys = {filter_key(f) for f in view_filters}
+        for view_filter in filters:
+            if filter_key(view_filter) not in keys:
+                keys.add(filter_key(view_filter))
+                view_filters.append(view_filter)
+    yield from views.items()
+
+
+def filter_key(view_filter):
+    return (view_filter['field'], view_filter['comparator'], str(view_filter['value']))
+
+
+def same_filters(new_filters, current_filters):
+    # filter order doesn't change what a view shows, so compare them as sets
+    return {filter_key(f) for f in new_filters} == {filter_key(f) for f in current_filters}
+
+
+def plan_view(new_name, filters, current_views):
+    # returns (action, view_obj) where action is create, update or noop
+    id = None
+    shared_with_users = []
+    shared_with_org = False
+    if new_name in current_views:        
+        if same_filters(filters, current_views[new_name]['filters']):
+            return 'noop', None
+
+        id = current_views[new_name]['id']
+        shared_with_users = current_views[new_name].get('sharedWithUsers', [])
+        shared_with_org = current_views[new_name].get('sharedWithOrganization', False)
+
+    view_obj = {
+            "id": id,
+            "title": new_name,
+            "filters": filters,
+            "sharedWithUsers": shared_with_users,
+            "sharedWithOrganization": shared_with_org,
+        }
+    return ('update' if id else 'create'), view_obj
+
+
+class RequestSpacer:
+    # keeps a minimum gap between requests made from any thread
+    def __init__(self, delay):
+        self.delay = delay
+        self.next_time = time()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            slot = max(time(), self.next_time)
+            self.next_time = slot + self.delay
+        if slot > time():
+            sleep(slot - time())
+
+
+def upsert_view(api_key, region, action, view_obj, limiter):
+    views_ep = '/views'
+    new_name = view_obj['title']
+    limiter.wait()
+    if action == 'update':
+        print(f"Updating view '{new_name}' with ID {view_obj['id']}.")
+        ep = f"{views_ep}/{view_obj['id']}"
+        response = cldy.put(ep, api_key=api_key, data=view_obj, region=region)
+    else:
+        print(f"Creating new view '{new_name}'.")
+        response = cldy.post(views_ep, api_key=api_key, data=view_obj, region=region)
+
+    if not response:
+        print(f"Failed to update or create view '{new_name}'.")
+        return 'failed'
+    print(f"Successfully updated or created view '{new_name}'.")
+    return action
+
+
+def sync_views(views, current_views, api_key, region, plan_only=False):
+    # views is an iterable of (name, filters). Each changed view is submitted as soon as it
+    # arrives. Returns counts per action.
+    counts = {}
+    limiter = RequestSpacer(UPSERT_DELAY)
+    futures = []
+    with ThreadPoolExecutor(max_workers=UPSERT_WORKERS) as executor:
+        for new_name, filters in views:
+            action, view_obj = plan_view(new_name, filters, current_views)
+            if action == 'noop' or plan_only:
+                print(f"{action}: '{new_name}'")
+                counts[action] = counts.get(action, 0) + 1
                 continue
+            futures.append(executor.submit(upsert_view, api_key, region, action, view_obj, limiter))
 
-            id = current_views[new_name]['id']
-            shared_with_users = current_views[new_name].get('sharedWithUsers', [])
-            shared_with_org = current_views[new_name].get('sharedWithOrganization', False)
-
-        view_obj = {
-                "id": id,
-                "title": new_name,
-                "filters": filters,
-                "sharedWithUsers": shared_with_users,
-                "sharedWithOrganization": shared_with_org,
-            }
-        
-        if view_obj['id']:
-            print(f"Updating view '{new_name}' with ID {view_obj['id']}.")
-            ep = f"{views_ep}/{view_obj['id']}"
-            response = cldy.put(ep, api_key=api_key, data=view_obj, region=region)
-        else:
-            print(f"Creating new view '{new_name}'.")
-            print(json.dumps(view_obj, indent=2))
-            response = cldy.post(views_ep, api_key=api_key, data=view_obj)
-
-        if not response:
-            print(f"Failed to update or create view '{new_name}'.")
-        else:
-            print(f"Successfully updated or created view '{new_name}'.")
+        for future in futures:
+            status = future.result()
+            counts[status] = counts.get(status, 0) + 1
+    return counts
 
                 
 
@@ -6,20 +6,60 @@ This script downloads and extracts audit logs from the Turbonomic API.
 The API returns a tar.gz compressed archive containing log files.
 
 Usage:
-    python get_auditlogs.py --jsessionid <JSESSIONID> [--days <DAYS>] [--url <TURBO_URL>]
+    python get_auditlogs.py --jsessionid <JSESSIONID> [--days <DAYS>] [--url <TURBO_URL>] [--stream] [--db <DB>]
+    python get_auditlogs.py --jsessionid <JSESSIONID> --sync <ARCHIVE_DIR> [--db <DB>]
+    python get_auditlogs.py query --db <DB> [--since <DATE>] [--user <USER>] [--action <ACTION>]
 
 Example:
     python get_auditlogs.py --jsessionid node01g4tqattmvscf1a9b0us8iw6xw232.node0 --days 1
 """
 
 import argparse
+import csv
+import gzip
+import hashlib
+import json
+import re
+import sqlite3
 import requests
 import tarfile
 import os
-from datetime import datetime
+import sys
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 
+# Read buffer used when streaming the archive straight from the HTTP response
+STREAM_BUFFER_SIZE = 1024 * 1024
+
+# Audit line format, e.g.:
+# 2026-04-08T00:00:29.387Z -[172.21.122.175] [SYSTEM] TURBONOMICAUDIT: "2026-04-08 00:00:29", "172.21.122.175", "Update Group", ...
+AUDIT_LINE_PATTERN = re.compile(
+    r'^(?P<timestamp>\S+)\s+-\[(?P<source_ip>[^\]]*)\]\s+\[(?P<user>[^\]]*)\]\s+TURBONOMICAUDIT:\s*(?P<fields>.*)$'
+)
+
+AUDIT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_entries (
+    entry_hash TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    user TEXT,
+    source_ip TEXT,
+    action TEXT,
+    target TEXT,
+    result TEXT,
+    details TEXT,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_entries (timestamp);
+CREATE INDEX IF NOT EXISTS idx_audit_user ON audit_entries (user, timestamp);
+CREATE INDEX IF NOT EXISTS idx_audit_action ON audit_entries (action, timestamp);
+CREATE INDEX IF NOT EXISTS idx_audit_target ON audit_entries (target, timestamp);
+"""
+
+# High-water mark file kept in the --sync archive directory
+SYNC_STATE_FILE = "sync_state.json"
+
+
 def download_auditlogs(turbo_url, jsessionid, days=1):
     """
     Download audit logs from Turbonomic API.
@@ -101,6 +141,108 @@ def extract_auditlogs(tar_file, output_dir=None):
         raise
 
 
+def iter_auditlog_members(turbo_url, jsessionid, days=1):
+    """
+    Stream audit logs from the Turbonomic API without saving the archive.
+    
+    The HTTP response is piped straight into tarfile's stream mode, so members
+    are available as soon as they arrive. Each file object must be read before
+    moving on to the next member.
+    
+    Args:
+        turbo_url: Base URL of Turbonomic instance
+        jsessionid: Session ID for authentication
+        days: Number of days of logs to retrieve (default: 1)
+    
+    Yields:
+        Tuples of (TarInfo, file object) for each regular file in the archive
+    """
+    api_endpoint = f"{turbo_url}/api/v3/admin/auditlogs"
+    params = {"days": days}
+    headers = {"Cookie": f"JSESSIONID={jsessionid}"}
+    
+    print(f"Streaming audit logs for the last {days} day(s)...")
+    print(f"URL: {api_endpoint}")
+    
+    try:
+        response = requests.get(api_endpoint, params=params, headers=headers, stream=True)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"Error downloading audit logs: {e}")
+        if hasattr(e, 'response') and e.response is not None:
+            print(f"Status code: {e.response.status_code}")
+            print(f"Response: {e.response.text}")
+        raise
+    
+    with response:
+        # Undo any transport-level Content-Encoding; the body itself is still the tar.gz
+        response.raw.decode_content = True
+        with tarfile.open(fileobj=response.raw, mode='r|gz', bufsize=STREAM_BUFFER_SIZE) as tar:
+            for member in tar:
+                if member.isfile():
+                    yield member, tar.extractfile(member)
+
+
+def stream_extract_auditlogs(turbo_url, jsessionid, days=1, output_dir=None):
+    """
+    Download and extract audit logs in one pass, writing members as they arrive.
+    No tar.gz file is written to disk.
+    
+    Args:
+        turbo_url: Base URL of Turbonomic instance
+        jsessionid: Session ID for authentication
+        days: Number of days of logs to retrieve (default: 1)
+        output_dir: Directory to extract to (default: auto-generated)
+    
+    Returns:
+        Path to extraction directory
+    """
+    if output_dir is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_dir = f"auditlogs_{timestamp}"
+    
+    root = Path(output_dir).resolve()
+    root.mkdir(parents=True, exist_ok=True)
+    
+    print(f"Extracting stream to: {output_dir}")
+    
+    count = 0
+    for member, fileobj in iter_auditlog_members(turbo_url, jsessionid, days):
+        target = (root / member.name).resolve()
+        if root != target and root not in target.parents:
+            print(f"  Skipping unsafe path in archive: {member.name}")
+            continue
+        
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target, 'wb') as f:
+            while True:
+                chunk = fileobj.read(STREAM_BUFFER_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+        
+        count += 1
+        print(f"  - {target.relative_to(root)} ({member.size:,} bytes)")
+    
+    print(f"\nExtracted {count} log file(s)")
+    return output_dir
+
+
+def read_auditlogs_in_memory(turbo_url, jsessionid, days=1):
+    """
+    Stream audit logs into memory for analysis, without touching the disk.
+    
+    Args:
+        turbo_url: Base URL of Turbonomic instance
+        jsessionid: Session ID for authentication
+        days: Number of days of logs to retrieve (default: 1)
+    
+    Returns:
+        Dictionary mapping archive member names to their contents (bytes)
+    """
+    return {member.name: fileobj.read() for member, fileobj in iter_auditlog_members(turbo_url, jsessionid, days)}
+
+
 def read_log_file(log_file, num_lines=None):
     """
     Read and display contents of a log file.
@@ -127,6 +269,362 @@ def read_log_file(log_file, num_lines=None):
         print(f"Error reading file: {e}")
 
 
+def parse_audit_line(line):
+    """
+    Parse one audit log line into its fields.
+    
+    Args:
+        line: Raw log line
+    
+    Returns:
+        Dictionary of entry fields, or None if the line is not an audit entry
+    """
+    line = line.rstrip('\r\n')
+    match = AUDIT_LINE_PATTERN.match(line)
+    if not match:
+        return None
+    
+    # Quoted, comma-separated fields: time, ip, action, target, result, details, code
+    fields = next(csv.reader([match.group('fields')], skipinitialspace=True), [])
+    fields += [''] * (6 - len(fields))
+    result = fields[4]
+    if result.startswith('result='):
+        result = result[len('result='):]
+    
+    return {
+        'entry_hash': hashlib.sha256(line.encode('utf-8')).hexdigest(),
+        'timestamp': match.group('timestamp'),
+        'user': match.group('user'),
+        'source_ip': match.group('source_ip'),
+        'action': fields[2],
+        'target': fields[3],
+        'result': result,
+        'details': fields[5],
+        'raw': line
+    }
+
+
+def open_audit_store(db_path):
+    """
+    Open (and create if needed) the local audit log store.
+    
+    Args:
+        db_path: Path to SQLite database file
+    
+    Returns:
+        sqlite3 connection
+    """
+    conn = sqlite3.connect(db_path)
+    conn.executescript(AUDIT_SCHEMA)
+    return conn
+
+
+def ingest_log_lines(conn, lines):
+    """
+    Insert audit entries into the store, skipping entries that are already present.
+    
+    Args:
+        conn: sqlite3 connection from open_audit_store
+        lines: Iterable of raw log lines
+    
+    Returns:
+        Tuple of (new entries added, lines that were not audit entries)
+    """
+    before = conn.total_changes
+    skipped = 0
+    
+    def entries():
+        nonlocal skipped
+        for line in lines:
+            entry = parse_audit_line(line)
+            if entry is None:
+                if line.strip():
+                    skipped += 1
+                continue
+            yield entry
+    
+    conn.executemany(
+        """INSERT OR IGNORE INTO audit_entries
+           (entry_hash, timestamp, user, source_ip, action, target, result, details, raw)
+           VALUES (:entry_hash, :timestamp, :user, :source_ip, :action, :target, :result, :details, :raw)""",
+        entries()
+    )
+    conn.commit()
+    return conn.total_changes - before, skipped
+
+
+def ingest_directory(db_path, log_dir):
+    """
+    Parse every extracted log file under a directory into the audit store.
+    
+    Args:
+        db_path: Path to SQLite database file
+        log_dir: Directory containing extracted audit logs
+    
+    Returns:
+        Number of new entries added
+    """
+    conn = open_audit_store(db_path)
+    added = 0
+    try:
+        for log_file in sorted(f for f in Path(log_dir).rglob('*') if f.is_file()):
+            with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
+                new, skipped = ingest_log_lines(conn, f)
+            added += new
+            if skipped:
+                print(f"  {log_file}: {skipped} non-audit line(s) ignored")
+        
+        total = conn.execute("SELECT COUNT(*) FROM audit_entries").fetchone()[0]
+    finally:
+        conn.close()
+    
+    print(f"Ingested {added:,} new audit entries into {db_path} ({total:,} total)")
+    return added
+
+
+def query_audit_store(db_path, since=None, until=None, user=None, action=None, target=None,
+                      result=None, text=None, limit=100):
+    """
+    Query the audit store. Filters are combined with AND; user, action and target
+    are exact matches, text is a substring match on the details.
+    
+    Args:
+        db_path: Path to SQLite database file
+        since: Only entries at or after this ISO date/time
+        until: Only entries before this ISO date/time
+        user: User name
+        action: Action type (e.g. "Update Group")
+        target: Target object name
+        result: Result (e.g. "Success")
+        text: Substring to look for in the details
+        limit: Maximum number of rows to return (None = no limit)
+    
+    Returns:
+        List of entry dictionaries, newest first
+    """
+    clauses = []
+    params = []
+    for column, value in (('user', user), ('action', action), ('target', target), ('result', result)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if since:
+        clauses.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        clauses.append("timestamp < ?")
+        params.append(until)
+    if text:
+        clauses.append("details LIKE ?")
+        params.append(f"%{text}%")
+    
+    sql = "SELECT timestamp, user, source_ip, action, target, result, details FROM audit_entries"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY timestamp DESC"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    
+    conn = open_audit_store(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+def parse_audit_timestamp(timestamp):
+    """
+    Convert an audit entry timestamp (e.g. 2026-04-08T00:00:29.387Z) to an aware datetime.
+    
+    Args:
+        timestamp: Timestamp string from the start of an audit line
+    
+    Returns:
+        datetime in UTC
+    """
+    parsed = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def load_sync_state(archive_dir):
+    """
+    Load the high-water mark for an incremental sync.
+    
+    Args:
+        archive_dir: Rolling archive directory
+    
+    Returns:
+        Dictionary with 'last_timestamp' and 'last_hashes' (empty if never synced)
+    """
+    state_file = Path(archive_dir) / SYNC_STATE_FILE
+    if not state_file.exists():
+        return {}
+    with open(state_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_sync_state(archive_dir, state):
+    """
+    Atomically save the high-water mark for an incremental sync.
+    
+    Args:
+        archive_dir: Rolling archive directory
+        state: Dictionary with 'last_timestamp' and 'last_hashes'
+    """
+    state_file = Path(archive_dir) / SYNC_STATE_FILE
+    tmp_file = state_file.with_suffix('.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_file, state_file)
+
+
+def read_archived_lines(day_file):
+    """
+    Read the lines already in a daily archive file.
+    
+    Args:
+        day_file: Path to an audit-YYYY-MM-DD.log.gz file
+    
+    Returns:
+        Set of archived lines (empty if the file does not exist yet)
+    """
+    if not day_file.exists():
+        return set()
+    with gzip.open(day_file, 'rt', encoding='utf-8', errors='ignore') as f:
+        return {line.rstrip('\r\n') for line in f}
+
+
+def sync_auditlogs(turbo_url, jsessionid, archive_dir, default_days=1, db_path=None):
+    """
+    Incrementally sync audit logs into a rolling archive partitioned by day.
+    
+    The high-water mark (last seen timestamp plus the hashes of the entries at that
+    timestamp) decides both the smallest covering --days window to request and which
+    entries are new. New entries are appended to gzip files named
+    <archive_dir>/YYYY/MM/audit-YYYY-MM-DD.log.gz, and optionally to an audit store.
+    
+    Args:
+        turbo_url: Base URL of Turbonomic instance
+        jsessionid: Session ID for authentication
+        archive_dir: Rolling archive directory
+        default_days: Days to request on the first sync (no high-water mark yet)
+        db_path: Optional SQLite audit store to add new entries to
+    
+    Returns:
+        Number of new entries archived
+    """
+    root = Path(archive_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    
+    state = load_sync_state(root)
+    last_timestamp = state.get('last_timestamp')
+    last_hashes = set(state.get('last_hashes', []))
+    
+    if last_timestamp:
+        # Count calendar days so the window covers the high-water mark whether the API
+        # treats "days" as a rolling 24h window or as whole days
+        last_day = parse_audit_timestamp(last_timestamp).date()
+        days = max(1, (datetime.now(timezone.utc).date() - last_day).days + 1)
+        print(f"High-water mark: {last_timestamp} (requesting {days} day(s))")
+    else:
+        days = default_days
+        print(f"No high-water mark in {archive_dir}; performing initial sync")
+    
+    new_entries = []
+    for member, fileobj in iter_auditlog_members(turbo_url, jsessionid, days):
+        for raw in fileobj:
+            entry = parse_audit_line(raw.decode('utf-8', errors='ignore'))
+            if entry is None:
+                continue
+            # ISO timestamps from the same source compare correctly as strings
+            if last_timestamp and (entry['timestamp'] < last_timestamp or
+                                   (entry['timestamp'] == last_timestamp and entry['entry_hash'] in last_hashes)):
+                continue
+            new_entries.append(entry)
+    
+    # The same entry can appear in more than one archive member
+    unique = {entry['entry_hash']: entry for entry in new_entries}
+    new_entries = sorted(unique.values(), key=lambda e: e['timestamp'])
+    
+    if not new_entries:
+        print("No new audit entries since the last sync")
+        return 0
+    
+    # The high-water mark is only saved after every write below, so a failed run is
+    # repeated in full next time. Both writes skip entries they already hold.
+    if db_path:
+        conn = open_audit_store(db_path)
+        try:
+            ingest_log_lines(conn, (entry['raw'] for entry in new_entries))
+        finally:
+            conn.close()
+    
+    by_day = {}
+    for entry in new_entries:
+        by_day.setdefault(entry['timestamp'][:10], []).append(entry['raw'])
+    
+    for day, lines in sorted(by_day.items()):
+        day_file = root / day[:4] / day[5:7] / f"audit-{day}.log.gz"
+        day_file.parent.mkdir(parents=True, exist_ok=True)
+        archived = read_archived_lines(day_file)
+        lines = [line for line in lines if line not in archived]
+        if not lines:
+            continue
+        # Appending writes a new gzip member; readers see one continuous file
+        with gzip.open(day_file, 'at', encoding='utf-8') as f:
+            for line in lines:
+                f.write(line + '\n')
+        print(f"  + {len(lines):,} entries -> {day_file.relative_to(root)}")
+    
+    newest = new_entries[-1]['timestamp']
+    newest_hashes = {e['entry_hash'] for e in new_entries if e['timestamp'] == newest}
+    if newest == last_timestamp:
+        newest_hashes |= last_hashes
+    save_sync_state(root, {'last_timestamp': newest, 'last_hashes': sorted(newest_hashes)})
+    
+    print(f"Archived {len(new_entries):,} new audit entries (high-water mark: {newest})")
+    return len(new_entries)
+
+
+def run_query(args):
+    """
+    Run the 'query' subcommand and print matching entries.
+    
+    Args:
+        args: Parsed command-line arguments
+    
+    Returns:
+        Exit code
+    """
+    if not Path(args.db).exists():
+        print(f"✗ Audit store not found: {args.db}")
+        return 1
+    
+    since = args.since
+    if args.last_days:
+        since = (datetime.now(timezone.utc) - timedelta(days=args.last_days)).strftime("%Y-%m-%dT%H:%M:%S")
+    
+    rows = query_audit_store(
+        args.db, since=since, until=args.until, user=args.user, action=args.action,
+        target=args.target, result=args.result, text=args.text, limit=args.limit
+    )
+    
+    if args.format == 'csv':
+        writer = csv.DictWriter(sys.stdout, fieldnames=['timestamp', 'user', 'source_ip', 'action', 'target', 'result', 'details'])
+        writer.writeheader()
+        writer.writerows(rows)
+        return 0
+    
+    for row in rows:
+        print(f"{row['timestamp']}  {row['user']:<20} {row['action']:<25} {row['target']:<30} {row['result']}")
+    print(f"\n{len(rows)} matching entr{'y' if len(rows) == 1 else 'ies'}")
+    return 0
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Download and extract Turbonomic audit logs',
@@ -141,12 +639,23 @@ Examples:
   
   # Specify custom Turbonomic URL
   python get_auditlogs.py --jsessionid <SESSION_ID> --url https://your-turbo-instance.com
+  
+  # Extract while downloading (no temporary tar.gz file)
+  python get_auditlogs.py --jsessionid <SESSION_ID> --days 7 --stream
+  
+  # Add the downloaded entries to a local queryable store
+  python get_auditlogs.py --jsessionid <SESSION_ID> --days 7 --db audit.db
+  
+  # Daily cron: fetch only what is new since the last run into a rolling archive
+  python get_auditlogs.py --jsessionid <SESSION_ID> --sync /backup/auditlogs
+  
+  # Who ran "Update Group" in the last week?
+  python get_auditlogs.py query --db audit.db --action "Update Group" --last-days 7
         """
     )
     
     parser.add_argument(
         '--jsessionid',
-        required=True,
         help='JSESSIONID for authentication (obtained from login API)'
     )
     
@@ -181,14 +690,71 @@ Examples:
         help='Keep the tar.gz file after extraction (default: delete)'
     )
     
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Extract files while downloading without saving the tar.gz archive'
+    )
+    
+    parser.add_argument(
+        '--db',
+        help='Ingest the extracted entries into this SQLite audit store (duplicates are skipped)'
+    )
+    
+    parser.add_argument(
+        '--sync',
+        metavar='ARCHIVE_DIR',
+        help='Incrementally merge entries newer than the last sync into a gzip archive partitioned by day'
+    )
+    
+    subparsers = parser.add_subparsers(dest='command')
+    query_parser = subparsers.add_parser('query', help='Query a local audit store created with --db')
+    query_parser.add_argument('--db', required=True, help='Path to SQLite audit store')
+    query_parser.add_argument('--since', help='Only entries at or after this time (e.g. 2026-04-01 or 2026-04-01T12:00)')
+    query_parser.add_argument('--until', help='Only entries before this time')
+    query_parser.add_argument('--last-days', type=int, help='Only entries from the last N days (overrides --since)')
+    query_parser.add_argument('--user', help='Exact user name (e.g. SYSTEM)')
+    query_parser.add_argument('--action', help='Exact action type (e.g. "Update Group")')
+    query_parser.add_argument('--target', help='Exact target name')
+    query_parser.add_argument('--result', help='Exact result (e.g. Success)')
+    query_parser.add_argument('--text', help='Substring to search for in the details')
+    query_parser.add_argument('--limit', type=int, default=100, help='Maximum rows to show (default: 100, 0 = all)')
+    query_parser.add_argument('--format', choices=['table', 'csv'], default='table', help='Output format (default: table)')
+    
     args = parser.parse_args()
     
+    if args.command == 'query':
+        return run_query(args)
+    
+    if not args.jsessionid:
+        parser.error('--jsessionid is required')
+    
+    if args.sync:
+        try:
+            sync_auditlogs(args.url, args.jsessionid, args.sync, args.days, args.db)
+        except Exception as e:
+            print(f"\n✗ Error: {e}")
+            return 1
+        return 0
+    
     try:
-        # Download audit logs
-        tar_file = download_auditlogs(args.url, args.jsessionid, args.days)
+        if args.stream:
+            if args.keep_archive:
+                print("Note: --keep-archive is ignored with --stream (no archive is written)")
+            
+            # Download and extract in one pass
+            tar_file = None
+            output_dir = stream_extract_auditlogs(args.url, args.jsessionid, args.days, args.output_dir)
+        else:
+            # Download audit logs
+            tar_file = download_auditlogs(args.url, args.jsessionid, args.days)
+            
+            # Extract archive
+            output_dir = extract_auditlogs(tar_file, args.output_dir)
         
-        # Extract archive
-        output_dir = extract_auditlogs(tar_file, args.output_dir)
+        # Add entries to the local audit store if requested
+        if args.db:
+            ingest_directory(args.db, output_dir)
         
         # Preview log files if requested
         if args.preview:
@@ -197,7 +763,7 @@ Examples:
                 read_log_file(log_file, args.preview)
         
         # Clean up tar.gz file unless --keep-archive is specified
-        if not args.keep_archive:
+        if tar_file and not args.keep_archive:
             os.remove(tar_file)
             print(f"\nRemoved archive file: {tar_file}")
         
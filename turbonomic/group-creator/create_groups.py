@@ -16,9 +16,14 @@ import logging
 import argparse
 import os
 import getpass
-from typing import Dict, List, Optional, Tuple
+import hashlib
+import re
+import sqlite3
+import tempfile
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urljoin
-from collections import defaultdict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 # Disable SSL warnings for self-signed certificates
 import urllib3
@@ -48,7 +53,28 @@ class TurbonomicGroupCreator:
         'pmsByMem', 'pmsByNumVms', 'vmsByMem', 'vmsByCPU'
     }
     
-    def __init__(self, turbo_url: str, username: str, password: str, dry_run: bool = False, force: bool = False, update_mode: bool = False):
+    # Criteria fields that determine group membership (compared when diffing groups)
+    CRITERIA_COMPARE_FIELDS = ('filterType', 'expType', 'expVal', 'caseSensitive')
+
+    # Concurrent requests used when fetching existing group details
+    DETAIL_FETCH_WORKERS = 8
+
+    # Page size for listing existing groups (cursor-based pagination)
+    GROUP_PAGE_SIZE = 500
+
+    # Look up CSV names directly (instead of listing every group) up to this many names
+    NAME_LOOKUP_THRESHOLD = 1000
+
+    # Number of names combined into one name-filtered search request
+    NAME_SEARCH_BATCH = 50
+
+    # Groups parsed before each plan/submit round when streaming a CSV
+    SYNC_BATCH_SIZE = 500
+
+    # Validation errors kept in memory for the end-of-parse report
+    MAX_REPORTED_ERRORS = 1000
+
+    def __init__(self, turbo_url: str, username: str, password: str, dry_run: bool = False, force: bool = False, update_mode: bool = False, sorted_input: bool = False):
         """
         Initialize the Turbonomic Group Creator
         
@@ -59,6 +85,7 @@ class TurbonomicGroupCreator:
             dry_run: If True, preview changes without creating groups
             force: If True, skip duplicate checking
             update_mode: If True, update existing groups instead of skipping them
+            sorted_input: If True, the CSV is sorted by group_name and groups are streamed as they complete
         """
         self.turbo_url = turbo_url.rstrip('/')
         self.username = username
@@ -66,6 +93,7 @@ class TurbonomicGroupCreator:
         self.dry_run = dry_run
         self.force = force
         self.update_mode = update_mode
+        self.sorted_input = sorted_input
         self.session = requests.Session()
         self.session.verify = False  # For self-signed certificates
         
@@ -74,9 +102,15 @@ class TurbonomicGroupCreator:
             'total': 0,
             'created': 0,
             'updated': 0,
+            'unchanged': 0,
             'skipped': 0,
-            'failed': 0
+            'failed': 0,
+            'invalid_rows': 0
         }
+        self.parse_errors = []
+
+        # Full existing-group index, fetched once up front for CSVs too large for name searches
+        self.existing_index = None
         
     def authenticate(self) -> bool:
         """
@@ -109,32 +143,292 @@ class TurbonomicGroupCreator:
             logger.error(f"Authentication error: {str(e)}")
             return False
     
-    def get_existing_groups(self) -> Dict[str, Dict]:
+    def _index_group(self, index: Dict[str, Dict], group: Dict):
         """
-        Get list of existing user-created groups
+        Add a group to the compact existing-group index (name -> uuid and content hash)
         
+        Args:
+            index: Index being built
+            group: Group data from the API
+        """
+        name = group.get('displayName')
+        if not name:
+            return
+        index[name] = {
+            'uuid': group.get('uuid'),
+            # The listing may not include criteria - hash is None until details are fetched
+            'hash': self.group_content_hash(group) if 'criteriaList' in group else None
+        }
+
+    def get_existing_groups(self, names: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Get a compact index of existing user-created groups.
+        Only displayName, uuid and a content hash are kept, so large tenants stay cheap in memory.
+
+        Args:
+            names: Optional group names from the CSV. When there are few of them, only those
+                   names are looked up instead of listing every group in the tenant. If the
+                   name search fails, the full listing is used instead.
+
         Returns:
-            Dictionary mapping group names to group data
+            Dictionary mapping group names to {'uuid': ..., 'hash': ...}
+
+        Raises:
+            RuntimeError: If the existing groups could not be listed completely. A partial
+                          index would make existing groups look new and cause duplicate creates.
         """
+        if names is not None and len(names) <= self.NAME_LOOKUP_THRESHOLD:
+            index = self.find_groups_by_name(names)
+            if index is not None:
+                return index
+            logger.warning("Group name search failed - falling back to the full group listing")
+
         groups_url = urljoin(self.turbo_url, '/api/v3/groups')
+        index = {}
+        cursor = None
+        pages = 0
         
         try:
-            response = self.session.get(
-                groups_url,
-                params={'group_origin': 'USER'}
-            )
+            while True:
+                params = {'group_origin': 'USER', 'limit': self.GROUP_PAGE_SIZE, 'disable_hateoas': 'true'}
+                if cursor:
+                    params['cursor'] = cursor
+
+                response = self.session.get(groups_url, params=params)
+
+                if response.status_code != 200:
+                    raise RuntimeError(f"Could not fetch existing groups: {response.status_code}")
+
+                for group in response.json():
+                    self._index_group(index, group)
+                pages += 1
+
+                # Turbonomic returns the next page cursor in a response header
+                cursor = response.headers.get('X-Next-Cursor')
+                if not cursor:
+                    break
+
+            logger.debug(f"Indexed {len(index)} existing groups from {pages} page(s)")
+            return index
+
+        except RuntimeError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Error fetching existing groups: {str(e)}") from e
+
+    def find_groups_by_name(self, names: List[str]) -> Optional[Dict[str, Dict]]:
+        """
+        Look up existing user groups by exact name using name-filtered searches
+
+        Args:
+            names: Group names to look up
+
+        Returns:
+            Dictionary mapping found group names to {'uuid': ..., 'hash': ...}, or None if
+            any search request failed (the results would be incomplete)
+        """
+        search_url = urljoin(self.turbo_url, '/api/v3/search')
+        wanted = set(names)
+        index = {}
+        ordered = sorted(wanted)
+
+        for start in range(0, len(ordered), self.NAME_SEARCH_BATCH):
+            batch = ordered[start:start + self.NAME_SEARCH_BATCH]
+            pattern = '^(' + '|'.join(re.escape(name) for name in batch) + ')$'
+            cursor = None
+
+            try:
+                while True:
+                    params = {
+                        'q': pattern,
+                        'types': 'Group',
+                        'group_origin': 'USER',
+                        'limit': self.GROUP_PAGE_SIZE,
+                        'disable_hateoas': 'true'
+                    }
+                    if cursor:
+                        params['cursor'] = cursor
+
+                    response = self.session.get(search_url, params=params)
+
+                    if response.status_code != 200:
+                        logger.warning(f"Group name search failed: {response.status_code}")
+                        return None
+
+                    for group in response.json():
+                        # The search is a regex match, so keep exact names only
+                        if group.get('displayName') in wanted:
+                            self._index_group(index, group)
+
+                    cursor = response.headers.get('X-Next-Cursor')
+                    if not cursor:
+                        break
+
+            except Exception as e:
+                logger.warning(f"Error searching for existing groups: {str(e)}")
+                return None
+
+        logger.debug(f"Found {len(index)} of {len(wanted)} CSV group names in Turbonomic")
+        return index
+
+    def get_group_details(self, group_uuid: str) -> Optional[Dict]:
+        """
+        Get the full definition (including criteriaList) of a single group
+
+        Args:
+            group_uuid: UUID of the group
+
+        Returns:
+            Group data dictionary, or None if it could not be fetched
+        """
+        group_url = urljoin(self.turbo_url, f'/api/v3/groups/{group_uuid}')
+
+        try:
+            response = self.session.get(group_url, params={'disable_hateoas': 'true'})
             
             if response.status_code == 200:
-                groups = response.json()
-                return {group['displayName']: group for group in groups}
+                return response.json()
             else:
-                logger.warning(f"Could not fetch existing groups: {response.status_code}")
-                return {}
+                logger.warning(f"Could not fetch group {group_uuid}: {response.status_code}")
+                return None
                 
         except Exception as e:
-            logger.warning(f"Error fetching existing groups: {str(e)}")
+            logger.warning(f"Error fetching group {group_uuid}: {str(e)}")
+            return None
+
+    def get_groups_details(self, group_uuids: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch full definitions for many groups concurrently
+
+        Args:
+            group_uuids: UUIDs of the groups to fetch
+
+        Returns:
+            Dictionary mapping group UUID to group data (failed fetches are omitted)
+        """
+        if not group_uuids:
             return {}
+
+        with ThreadPoolExecutor(max_workers=self.DETAIL_FETCH_WORKERS) as executor:
+            results = executor.map(self.get_group_details, group_uuids)
+            details = {uuid: group for uuid, group in zip(group_uuids, results) if group}
+
+        logger.info(f"Fetched criteria for {len(details)}/{len(group_uuids)} existing groups")
+        return details
+
+    def normalise_group(self, group: Dict) -> Dict:
+        """
+        Build a canonical form of a group for structural comparison.
+        Criteria order, key order and expType/logicalOperator casing are ignored.
+
+        Args:
+            group: Group configuration (from CSV) or group data (from the API)
+
+        Returns:
+            Dictionary with groupType, logicalOperator and a sorted criteria list
+        """
+        criteria = []
+        for criterion in group.get('criteriaList') or []:
+            values = {field: criterion.get(field) for field in self.CRITERIA_COMPARE_FIELDS}
+            values['filterType'] = values['filterType'] or ''
+            values['expType'] = (values['expType'] or '').upper()
+            values['expVal'] = str(values['expVal'] or '')
+            values['caseSensitive'] = bool(values['caseSensitive'])
+            criteria.append(tuple(values[field] for field in self.CRITERIA_COMPARE_FIELDS))
+
+        return {
+            'groupType': group.get('groupType'),
+            'logicalOperator': (group.get('logicalOperator') or 'AND').upper(),
+            'criteria': sorted(criteria)
+        }
+
+    def diff_group(self, group_config: Dict, existing_group: Dict) -> List[str]:
+        """
+        Compare a CSV group configuration against an existing group
+
+        Args:
+            group_config: Group configuration built from the CSV
+            existing_group: Existing group data from Turbonomic
+
+        Returns:
+            List of field names that differ (empty if the groups match)
+        """
+        desired = self.normalise_group(group_config)
+        current = self.normalise_group(existing_group)
+        return [field for field in ('groupType', 'logicalOperator', 'criteria') if desired[field] != current[field]]
+
+    def group_content_hash(self, group: Dict) -> str:
+        """
+        Hash the normalised structure of a group
+
+        Args:
+            group: Group configuration (from CSV) or group data (from the API)
+
+        Returns:
+            Hex digest that is equal for structurally identical groups
+        """
+        canonical = json.dumps(self.normalise_group(group), sort_keys=True)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
     
+    def plan_sync(self, groups: List[Dict], existing_groups: Dict[str, Dict]) -> Dict[str, List]:
+        """
+        Decide what to do with each CSV group before any changes are sent
+
+        Args:
+            groups: Group configurations parsed from the CSV
+            existing_groups: Existing group index from get_existing_groups
+
+        Returns:
+            Dictionary with 'create', 'update' (uuid, config), 'noop' and 'skip' lists
+        """
+        plan = {'create': [], 'update': [], 'noop': [], 'skip': []}
+        matched = []
+
+        for group_config in groups:
+            existing = existing_groups.get(group_config['displayName'])
+            if existing is None:
+                plan['create'].append(group_config)
+            elif self.update_mode:
+                matched.append((group_config, existing))
+            elif self.force:
+                # Force create (will likely fail with 409, but try anyway)
+                plan['create'].append(group_config)
+            else:
+                plan['skip'].append(group_config)
+
+        # The group listing may omit criteria, so fetch full definitions for matched groups in bulk
+        missing = [existing['uuid'] for _, existing in matched
+                   if existing.get('uuid') and existing.get('hash') is None]
+        details = self.get_groups_details(missing)
+
+        for group_config, existing in matched:
+            group_uuid = existing.get('uuid')
+            if not group_uuid:
+                logger.error(f"  ✗ Could not find UUID for existing group '{group_config['displayName']}'")
+                self.stats['failed'] += 1
+                continue
+
+            current_hash = existing.get('hash')
+            if current_hash is None and group_uuid in details:
+                current_hash = self.group_content_hash(details[group_uuid])
+
+            if current_hash is None:
+                # Could not compare - send the update to be safe
+                plan['update'].append((group_uuid, group_config))
+            elif current_hash != self.group_content_hash(group_config):
+                if group_uuid in details:
+                    changed = self.diff_group(group_config, details[group_uuid])
+                    logger.debug(f"Group '{group_config['displayName']}' differs in: {', '.join(changed)}")
+                plan['update'].append((group_uuid, group_config))
+            else:
+                plan['noop'].append(group_config)
+
+        logger.info(
+            f"Plan: {len(plan['create'])} to create, {len(plan['update'])} to update, "
+            f"{len(plan['noop'])} unchanged, {len(plan['skip'])} skipped"
+        )
+        return plan
+
     def get_default_exp_type(self, filter_type: str) -> str:
         """
         Determine the appropriate expression type based on filter type
@@ -158,15 +452,231 @@ class TurbonomicGroupCreator:
             row_num: Row number for error reporting
             
         Returns:
-            Tuple of (is_valid, error_message)
+            Tuple of (is_valid, error_message). The message lists every missing field.
         """
         required_fields = ['group_name', 'group_type', 'filter_type', 'exp_val']
         
-        for field in required_fields:
-            if field not in row or not row[field].strip():
-                return False, f"Row {row_num}: Missing required field '{field}'"
+        missing = [field for field in required_fields if not (row.get(field) or '').strip()]
+        if missing:
+            fields = ', '.join(f"'{field}'" for field in missing)
+            return False, f"Row {row_num}: Missing required field{'s' if len(missing) > 1 else ''} {fields}"
         
         return True, None
+
+    def _record_parse_error(self, error: str):
+        """
+        Record a CSV validation error, keeping at most MAX_REPORTED_ERRORS messages in memory
+
+        Args:
+            error: Error message
+        """
+        self.stats['invalid_rows'] += 1
+        if len(self.parse_errors) < self.MAX_REPORTED_ERRORS:
+            self.parse_errors.append(error)
+
+    def iter_csv_rows(self, csv_file: str) -> Iterator[Tuple[int, str, str, str, Dict]]:
+        """
+        Stream and validate CSV rows one at a time.
+        Invalid rows are recorded (see report_parse_errors) and skipped.
+
+        Args:
+            csv_file: Path to CSV file
+
+        Yields:
+            Tuples of (row_num, group_name, group_type, logical_operator, criteria)
+        """
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+
+            for idx, row in enumerate(reader, start=2):  # Start at 2 (header is row 1)
+                is_valid, error = self.validate_csv_row(row, idx)
+
+                if not is_valid:
+                    self._record_parse_error(error)
+                    continue
+
+                filter_type = row['filter_type'].strip()
+                logical_op = (row.get('logical_operator') or 'AND').strip().upper() or 'AND'
+
+                # Intelligently determine exp_type based on filter_type if not explicitly provided
+                exp_type_raw = (row.get('exp_type') or '').strip()
+                if exp_type_raw:
+                    exp_type = exp_type_raw
+                else:
+                    # Auto-select based on filter type
+                    exp_type = self.get_default_exp_type(filter_type)
+                    logger.debug(f"Auto-selected exp_type '{exp_type}' for filter_type '{filter_type}'")
+
+                criteria = {
+                    'expVal': row['exp_val'].strip(),
+                    'expType': exp_type,
+                    'filterType': filter_type,
+                    'caseSensitive': (row.get('case_sensitive') or 'false').strip().lower() == 'true',
+                    'entityType': None,
+                    'singleLine': False
+                }
+
+                yield idx, row['group_name'].strip(), row['group_type'].strip(), logical_op, criteria
+
+    def _build_group_config(self, group_name: str, group_type: str, logical_op: str, criteria_list: List[Dict]) -> Dict:
+        """
+        Build the API group configuration for a group
+
+        Args:
+            group_name: Display name of the group
+            group_type: Entity type of the group
+            logical_op: Logical operator combining the criteria
+            criteria_list: List of criteria dictionaries
+
+        Returns:
+            Group configuration dictionary
+        """
+        return {
+            'displayName': group_name,
+            'className': 'Group',
+            'groupType': group_type,
+            'isStatic': False,
+            'logicalOperator': logical_op,
+            'memberUuidList': [],
+            'criteriaList': criteria_list
+        }
+
+    def _iter_sorted_groups(self, csv_file: str) -> Iterator[Dict]:
+        """
+        Emit groups from a CSV already sorted by group_name, without buffering other groups
+
+        Args:
+            csv_file: Path to CSV file
+
+        Yields:
+            Group configuration dictionaries, each as soon as its last row is read
+        """
+        current = None
+        emitted = set()
+
+        for idx, group_name, group_type, logical_op, criteria in self.iter_csv_rows(csv_file):
+            if current and current['displayName'] != group_name:
+                emitted.add(current['displayName'])
+                yield current
+                current = None
+
+            if current is None:
+                if group_name in emitted:
+                    self._record_parse_error(
+                        f"Row {idx}: Group '{group_name}' appears again after other groups "
+                        f"(CSV is not sorted by group_name)"
+                    )
+                    continue
+                current = self._build_group_config(group_name, group_type, logical_op, [])
+            elif current['groupType'] != group_type:
+                logger.warning(f"Row {idx}: Group '{group_name}' has inconsistent group_type. Using first occurrence.")
+
+            current['criteriaList'].append(criteria)
+
+        if current:
+            yield current
+
+    def _iter_spilled_groups(self, csv_file: str) -> Iterator[Dict]:
+        """
+        Emit groups from an unsorted CSV by spilling rows to a temporary SQLite database,
+        so memory use does not grow with the size of the file
+
+        Args:
+            csv_file: Path to CSV file
+
+        Yields:
+            Group configuration dictionaries in order of first appearance
+        """
+        with tempfile.TemporaryDirectory(prefix='group_creator_') as tmp_dir:
+            conn = sqlite3.connect(os.path.join(tmp_dir, 'groups.db'))
+            try:
+                conn.execute(
+                    'CREATE TABLE groups (name TEXT PRIMARY KEY, first_row INTEGER, '
+                    'group_type TEXT, logical_op TEXT)'
+                )
+                conn.execute('CREATE TABLE criteria (name TEXT, row_num INTEGER, data TEXT)')
+
+                for idx, group_name, group_type, logical_op, criteria in self.iter_csv_rows(csv_file):
+                    # Store group type (should be same for all rows with same group_name)
+                    existing = conn.execute(
+                        'SELECT group_type FROM groups WHERE name = ?', (group_name,)
+                    ).fetchone()
+                    if existing is None:
+                        conn.execute(
+                            'INSERT INTO groups VALUES (?, ?, ?, ?)',
+                            (group_name, idx, group_type, logical_op)
+                        )
+                    elif existing[0] != group_type:
+                        logger.warning(f"Row {idx}: Group '{group_name}' has inconsistent group_type. Using first occurrence.")
+
+                    conn.execute('INSERT INTO criteria VALUES (?, ?, ?)', (group_name, idx, json.dumps(criteria)))
+
+                conn.execute('CREATE INDEX idx_criteria_name ON criteria (name, row_num)')
+                conn.commit()
+
+                groups_cursor = conn.execute('SELECT name, group_type, logical_op FROM groups ORDER BY first_row')
+                for group_name, group_type, logical_op in groups_cursor:
+                    criteria_list = [
+                        json.loads(data) for (data,) in conn.execute(
+                            'SELECT data FROM criteria WHERE name = ? ORDER BY row_num', (group_name,)
+                        )
+                    ]
+                    yield self._build_group_config(group_name, group_type, logical_op, criteria_list)
+            finally:
+                conn.close()
+
+    def iter_groups(self, csv_file: str, sorted_input: bool = False) -> Iterator[Dict]:
+        """
+        Lazily parse the CSV into group configurations.
+        Supports multiple criteria per group by grouping rows with the same group_name.
+
+        Args:
+            csv_file: Path to CSV file
+            sorted_input: If True, the CSV is sorted by group_name and groups are emitted
+                          as soon as they are complete. Otherwise rows are spilled to a
+                          temporary SQLite database first.
+
+        Yields:
+            Group configuration dictionaries
+        """
+        if sorted_input:
+            yield from self._iter_sorted_groups(csv_file)
+        else:
+            yield from self._iter_spilled_groups(csv_file)
+
+    def count_csv_groups(self, csv_file: str, limit: Optional[int] = None) -> int:
+        """
+        Count the distinct group names in the CSV without building the groups
+
+        Args:
+            csv_file: Path to CSV file
+            limit: Stop counting once more than this many groups have been seen
+
+        Returns:
+            Number of distinct non-empty group_name values (at most limit + 1)
+        """
+        names = set()
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                name = (row.get('group_name') or '').strip()
+                if name:
+                    names.add(name)
+                    if limit is not None and len(names) > limit:
+                        break
+        return len(names)
+
+    def report_parse_errors(self):
+        """Log every CSV validation error collected during parsing"""
+        if not self.stats['invalid_rows']:
+            return
+
+        logger.error(f"{self.stats['invalid_rows']} invalid CSV row(s) were skipped:")
+        for error in self.parse_errors:
+            logger.error(f"  {error}")
+
+        hidden = self.stats['invalid_rows'] - len(self.parse_errors)
+        if hidden > 0:
+            logger.error(f"  ... and {hidden} more")
     
     def parse_csv(self, csv_file: str) -> List[Dict]:
         """
@@ -179,72 +689,9 @@ class TurbonomicGroupCreator:
         Returns:
             List of group configuration dictionaries
         """
-        groups_dict = defaultdict(lambda: {
-            'criteriaList': [],
-            'groupType': None,
-            'logicalOperator': 'AND'
-        })
-        
         try:
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                
-                for idx, row in enumerate(reader, start=2):  # Start at 2 (header is row 1)
-                    is_valid, error = self.validate_csv_row(row, idx)
-                    
-                    if not is_valid:
-                        logger.error(error)
-                        continue
-                    
-                    group_name = row['group_name'].strip()
-                    group_type = row['group_type'].strip()
-                    filter_type = row['filter_type'].strip()
-                    logical_op = row.get('logical_operator', 'AND').strip().upper() or 'AND'
-                    
-                    # Intelligently determine exp_type based on filter_type if not explicitly provided
-                    exp_type_raw = row.get('exp_type', '').strip()
-                    if exp_type_raw:
-                        exp_type = exp_type_raw
-                    else:
-                        # Auto-select based on filter type
-                        exp_type = self.get_default_exp_type(filter_type)
-                    
-                    # Store group type (should be same for all rows with same group_name)
-                    if groups_dict[group_name]['groupType'] is None:
-                        groups_dict[group_name]['groupType'] = group_type
-                        groups_dict[group_name]['logicalOperator'] = logical_op
-                    elif groups_dict[group_name]['groupType'] != group_type:
-                        logger.warning(f"Row {idx}: Group '{group_name}' has inconsistent group_type. Using first occurrence.")
-                    
-                    # Add criteria to the group
-                    criteria = {
-                        'expVal': row['exp_val'].strip(),
-                        'expType': exp_type,
-                        'filterType': filter_type,
-                        'caseSensitive': row.get('case_sensitive', 'false').strip().lower() == 'true',
-                        'entityType': None,
-                        'singleLine': False
-                    }
-                    
-                    # Log if auto-selected exp_type
-                    if not exp_type_raw:
-                        logger.debug(f"Auto-selected exp_type '{exp_type}' for filter_type '{filter_type}'")
-                    
-                    groups_dict[group_name]['criteriaList'].append(criteria)
-            
-            # Convert to list of group configurations
-            groups = []
-            for group_name, group_data in groups_dict.items():
-                group_config = {
-                    'displayName': group_name,
-                    'className': 'Group',
-                    'groupType': group_data['groupType'],
-                    'isStatic': False,
-                    'logicalOperator': group_data['logicalOperator'],
-                    'memberUuidList': [],
-                    'criteriaList': group_data['criteriaList']
-                }
-                groups.append(group_config)
+            groups = list(self.iter_groups(csv_file))
+            self.report_parse_errors()
             
             logger.info(f"Parsed {len(groups)} groups from CSV file")
             total_criteria = sum(len(g['criteriaList']) for g in groups)
@@ -334,6 +781,49 @@ class TurbonomicGroupCreator:
             logger.error(f"✗ Error creating group '{group_config['displayName']}': {str(e)}")
             return False
     
+    @contextmanager
+    def backup_writer(self) -> Iterator[Callable[[List[Dict]], None]]:
+        """
+        Open a backup file that group configurations can be appended to in batches.
+        The file is only created when the first batch is appended.
+
+        Yields:
+            Function that appends a list of group configurations to the backup
+        """
+        timestamp = int(time.time())
+        backup_file = f"backups/groups_backup_{timestamp}.json"
+        f = None
+        failed = False
+        written = 0
+
+        def append(groups: List[Dict]):
+            nonlocal f, failed, written
+            if failed or not groups:
+                return
+
+            try:
+                if f is None:
+                    if not os.path.exists('backups'):
+                        os.makedirs('backups')
+                    f = open(backup_file, 'w', encoding='utf-8')
+
+                for group in groups:
+                    f.write('[\n' if written == 0 else ',\n')
+                    f.write(json.dumps(group, indent=2))
+                    written += 1
+                f.flush()
+            except Exception as e:
+                logger.warning(f"Could not save backup: {str(e)}")
+                failed = True
+
+        try:
+            yield append
+        finally:
+            if f is not None:
+                f.write('\n]' if written else '[]')
+                f.close()
+                logger.info(f"Backup saved to: {backup_file}")
+
     def save_backup(self, groups: List[Dict]):
         """
         Save backup of groups to be created
@@ -341,77 +831,54 @@ class TurbonomicGroupCreator:
         Args:
             groups: List of group configurations
         """
-        if not os.path.exists('backups'):
-            os.makedirs('backups')
-        
-        timestamp = int(time.time())
-        backup_file = f"backups/groups_backup_{timestamp}.json"
-        
-        try:
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                json.dump(groups, f, indent=2)
-            logger.info(f"Backup saved to: {backup_file}")
-        except Exception as e:
-            logger.warning(f"Could not save backup: {str(e)}")
+        with self.backup_writer() as append:
+            append(groups)
     
-    def process_groups(self, csv_file: str):
+    def sync_batch(self, groups: List[Dict]):
         """
-        Main processing function to create or update groups from CSV
+        Plan and apply changes for one batch of groups
         
         Args:
-            csv_file: Path to CSV file
+            groups: Group configurations for this batch
         """
-        # Parse CSV
-        groups = self.parse_csv(csv_file)
+        # Get existing groups (only the names in this batch are looked up, unless the
+        # full listing was already fetched for a large CSV)
+        existing_groups = {}
+        if self.existing_index is not None:
+            existing_groups = self.existing_index
+        elif not self.dry_run:
+            existing_groups = self.get_existing_groups([g['displayName'] for g in groups])
+            logger.info(f"Found {len(existing_groups)} matching existing user groups")
         
-        if not groups:
-            logger.error("No valid groups found in CSV file")
-            return
+        # Work out what needs to change before sending anything
+        plan = self.plan_sync(groups, existing_groups)
+        self.stats['unchanged'] += len(plan['noop'])
+        self.stats['skipped'] += len(plan['skip'])
         
-        self.stats['total'] = len(groups)
+        for group_config in plan['skip']:
+            logger.warning(f"  ⊘ Skipping '{group_config['displayName']}' - group already exists (use --update to modify)")
         
-        # Save backup
-        self.save_backup(groups)
+        for group_config in plan['noop']:
+            logger.debug(f"  = Unchanged: {group_config['displayName']}")
         
-        # Get existing groups
-        existing_groups = {}
-        if not self.dry_run:
-            existing_groups = self.get_existing_groups()
-            logger.info(f"Found {len(existing_groups)} existing user groups")
+        changes = [(None, g) for g in plan['create']] + plan['update']
         
-        # Process each group
+        # Process each changed group
         logger.info(f"\n{'='*60}")
-        logger.info(f"Processing {len(groups)} groups...")
+        logger.info(f"Processing {len(changes)} changed groups...")
         logger.info(f"{'='*60}\n")
         
-        for idx, group_config in enumerate(groups, start=1):
+        for idx, (group_uuid, group_config) in enumerate(changes, start=1):
             group_name = group_config['displayName']
             
-            logger.info(f"[{idx}/{len(groups)}] Processing: {group_name}")
+            logger.info(f"[{idx}/{len(changes)}] Processing: {group_name}")
             
-            # Check if group already exists
-            if group_name in existing_groups:
-                if self.update_mode:
-                    # Update existing group
-                    group_uuid = existing_groups[group_name].get('uuid')
-                    if group_uuid:
-                        if self.update_group(group_uuid, group_config):
-                            self.stats['updated'] += 1
-                        else:
-                            self.stats['failed'] += 1
-                    else:
-                        logger.error(f"  ✗ Could not find UUID for existing group")
-                        self.stats['failed'] += 1
-                elif self.force:
-                    # Force create (will likely fail with 409, but try anyway)
-                    if self.create_group(group_config):
-                        self.stats['created'] += 1
-                    else:
-                        self.stats['failed'] += 1
+            if group_uuid:
+                # Update existing group
+                if self.update_group(group_uuid, group_config):
+                    self.stats['updated'] += 1
                 else:
-                    # Skip existing group
-                    logger.warning(f"  ⊘ Skipping - group already exists (use --update to modify)")
-                    self.stats['skipped'] += 1
+                    self.stats['failed'] += 1
             else:
                 # Create new group
                 if self.create_group(group_config):
@@ -421,6 +888,57 @@ class TurbonomicGroupCreator:
             
             # Small delay to avoid rate limiting
             time.sleep(0.5)
+
+    def process_groups(self, csv_file: str):
+        """
+        Main processing function to create or update groups from CSV.
+        Groups are parsed lazily and submitted in batches of SYNC_BATCH_SIZE, so
+        uploading starts before a large CSV has been fully read.
+
+        Args:
+            csv_file: Path to CSV file
+        """
+        try:
+            # Batches never exceed NAME_LOOKUP_THRESHOLD names, so decide between name
+            # searches and a single full listing from the number of groups in the whole CSV
+            self.existing_index = None
+            threshold = self.NAME_LOOKUP_THRESHOLD
+            if not self.dry_run and self.count_csv_groups(csv_file, limit=threshold) > threshold:
+                self.existing_index = self.get_existing_groups()
+                logger.info(f"Found {len(self.existing_index)} existing user groups")
+
+            with self.backup_writer() as append_backup:
+                batch = []
+                for group_config in self.iter_groups(csv_file, sorted_input=self.sorted_input):
+                    batch.append(group_config)
+                    if len(batch) >= self.SYNC_BATCH_SIZE:
+                        self.stats['total'] += len(batch)
+                        append_backup(batch)
+                        self.sync_batch(batch)
+                        batch = []
+
+                if batch:
+                    self.stats['total'] += len(batch)
+                    append_backup(batch)
+                    self.sync_batch(batch)
+
+        except FileNotFoundError:
+            logger.error(f"CSV file not found: {csv_file}")
+            return
+        except (csv.Error, UnicodeDecodeError) as e:
+            logger.error(f"Error parsing CSV: {str(e)}")
+            return
+        except Exception as e:
+            logger.error(f"✗ Sync stopped after reading {self.stats['total']} group(s): {str(e)}")
+            self.report_parse_errors()
+            self.print_summary()
+            return
+
+        self.report_parse_errors()
+
+        if not self.stats['total']:
+            logger.error("No valid groups found in CSV file")
+            return
         
         # Print summary
         self.print_summary()
@@ -433,8 +951,10 @@ class TurbonomicGroupCreator:
         logger.info(f"Total groups in CSV:  {self.stats['total']}")
         logger.info(f"Successfully created: {self.stats['created']}")
         logger.info(f"Successfully updated: {self.stats['updated']}")
+        logger.info(f"Unchanged (no-op):    {self.stats['unchanged']}")
         logger.info(f"Skipped (existing):   {self.stats['skipped']}")
         logger.info(f"Failed:               {self.stats['failed']}")
+        logger.info(f"Invalid CSV rows:     {self.stats['invalid_rows']}")
         logger.info(f"{'='*60}\n")
 
 
@@ -460,6 +980,9 @@ Examples:
   # Force creation (skip duplicate checking)
   python create_groups.py https://turbo.example.com admin groups.csv --force
   
+  # Very large CSV already sorted by group_name (streams groups as they complete)
+  python create_groups.py https://turbo.example.com admin groups.csv --sorted-input
+
   # Debug mode
   python create_groups.py https://turbo.example.com admin groups.csv --debug
         """
@@ -472,6 +995,7 @@ Examples:
     parser.add_argument('--dry-run', action='store_true', help='Preview changes without creating groups')
     parser.add_argument('--update', action='store_true', help='Update existing groups instead of skipping them')
     parser.add_argument('--force', action='store_true', help='Skip duplicate checking (not recommended with --update)')
+    parser.add_argument('--sorted-input', action='store_true', help='CSV is sorted by group_name; stream groups without a temporary spill file')
     parser.add_argument('--debug', action='store_true', help='Enable debug logging')
     
     args = parser.parse_args()
@@ -493,7 +1017,8 @@ Examples:
         password=password,
         dry_run=args.dry_run,
         force=args.force,
-        update_mode=args.update
+        update_mode=args.update,
+        sorted_input=args.sorted_input
     )
     
     # Authenticate